@@ -50,6 +50,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'hmmrspce.middleware.ActivityLogMiddleware',
 ]
 
 ROOT_URLCONF = 'collectionapp.urls'
@@ -82,6 +83,17 @@ DATABASES = {
     }
 }
 
+# Stats and discovery feeds are invalidated by bumping version keys in the
+# default cache, so every worker and management command must share it. The
+# database cache needs `python manage.py createcachetable`; Redis or
+# Memcached work as well. A process-local cache fails check hmmrspce.W001.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'hmmrspce_cache',
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -123,6 +135,23 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# Serve the esbuild bundles from static/dist (npm run build:prod) instead of
+# the per-module tsc output in static/js
+USE_STATIC_BUNDLES = False
+
+# Content-hashed filenames plus .gz/.br variants; run collectstatic on deploy.
+# Chosen explicitly rather than from DEBUG so every profile gets the same
+# storage unless it overrides STORAGES. With DEBUG on, the manifest storage
+# serves unhashed names, so development doesn't need collectstatic.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'hmmrspce.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
@@ -137,10 +166,17 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'hmmrspce.renderers.FastJSONRenderer',
     ],
 }
 
+# Deployment profiles
+# This module is the full (admin) profile. settings_api and settings_public
+# trim it down for API-only and page-only workers.
+
+SERVE_PAGES = True
+SERVE_API = True
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,34 @@
+"""
+API-only settings profile for collectionapp.
+
+Serves /api/ with token authentication. Admin, sessions, messages and the
+page templates are left out so workers boot faster and use less memory.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'rest_framework',
+    'rest_framework.authtoken',
+    'hmmrspce',
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'hmmrspce.middleware.ActivityLogMiddleware',
+]
+
+TEMPLATES = []
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,  # noqa: F405
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.TokenAuthentication',
+    ],
+}
+
+SERVE_PAGES = False
+SERVE_API = True
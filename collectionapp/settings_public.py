@@ -0,0 +1,35 @@
+"""
+Page-only settings profile for collectionapp.
+
+Serves the HTML pages and static files; the browser talks to /api/ on an
+API worker. No admin, sessions, messages or REST framework are loaded.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.staticfiles',
+    'hmmrspce',
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+TEMPLATES = [
+    {
+        **TEMPLATES[0],  # noqa: F405
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+            ],
+        },
+    },
+]
+
+SERVE_PAGES = True
+SERVE_API = False
@@ -14,16 +14,22 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('', include('hmmrspce.urls')),
-    path('api-auth/', include('rest_framework.urls')),
 ]
 
+# Admin and the browsable API login are only wired up when their apps are installed
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
+
+if apps.is_installed('django.contrib.sessions') and getattr(settings, 'SERVE_API', True):
+    urlpatterns.append(path('api-auth/', include('rest_framework.urls')))
+
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,50 @@
+from contextvars import ContextVar
+
+from django.db import transaction
+from .models import ActivityEvent
+
+
+_buffer = ContextVar('activity_buffer', default=None)
+
+
+def record(collection_id, verb, target_type, target_id, actor=None, **data):
+    """
+    Queue an activity event.
+
+    Nothing is kept for transactions that roll back. Inside a request the
+    event is buffered once its transaction commits and written with the rest
+    of the request's events by flush(); elsewhere it is written on commit.
+    """
+    event = ActivityEvent(
+        collection_id=collection_id,
+        actor=actor,
+        verb=verb,
+        target_type=target_type,
+        target_id=target_id,
+        data=data,
+    )
+    buffer = _buffer.get()
+    if buffer is not None:
+        transaction.on_commit(lambda: buffer.append(event))
+    else:
+        transaction.on_commit(lambda: ActivityEvent.objects.bulk_create([event]))
+
+
+def start_buffer():
+    return _buffer.set([])
+
+
+def flush(token, actor=None):
+    """Write the buffered events with a single bulk insert once the transaction commits"""
+    events = _buffer.get()
+    _buffer.reset(token)
+    if not events:
+        return
+    for event in events:
+        if event.actor_id is None and actor is not None:
+            event.actor = actor
+    transaction.on_commit(lambda: ActivityEvent.objects.bulk_create(events))
+
+
+def discard(token):
+    _buffer.reset(token)
@@ -1,26 +1,168 @@
 from django.contrib import admin
-from .models import Collection, Item, CollectionShare
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from .fingerprints import normalize_isbn, normalize_name
+from .models import (
+    Collection, CollectionTemplate, Item, CollectionShare, ShareGroup, CollectionGroupShare
+)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that never runs a full COUNT(*) on large tables.
+
+    Unfiltered PostgreSQL lists use the planner's row estimate; anything else
+    counts at most MAX_COUNT rows, so only the first pages are linked.
+    """
+    MAX_COUNT = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if not queryset.query.where and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT reltuples FROM pg_class WHERE relname = %s',
+                               [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+            if row and row[0] > self.MAX_COUNT:
+                return int(row[0])
+        return queryset.order_by().values('pk')[:self.MAX_COUNT].count()
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    """
+    Defaults for admin lists over tables too large to count or list in full.
+
+    Lists are ordered by primary key, and subclasses implement search with
+    case-sensitive prefix/exact lookups: admin's '^' and '=' search fields
+    become UPPER(...) LIKE comparisons that no plain index can serve.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    ordering = ['-pk']
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        return queryset.filter(self.search_q(term)), False
+
+    def search_q(self, term):
+        raise NotImplementedError
+
+
+def _collections_named(prefix):
+    return Collection.all_objects.filter(name__startswith=prefix).values('pk')
+
+
+def _users_named(username):
+    return User.objects.filter(username=username).values('pk')
+
+
+class InputFilter(admin.SimpleListFilter):
+    """List filter rendered as a text box, for relations with too many rows to list"""
+    template = 'admin/input_filter.html'
+    placeholder = ''
+
+    def lookups(self, request, model_admin):
+        # A filter with no lookups isn't rendered at all
+        return [('', '')]
+
+    def choices(self, changelist):
+        all_choice = next(super().choices(changelist))
+        all_choice['query_parts'] = [
+            (name, value)
+            for name, values in changelist.get_filters_params().items() if name != self.parameter_name
+            for value in (values if isinstance(values, list) else [values])
+        ]
+        yield all_choice
+
+
+class CollectionFilter(InputFilter):
+    title = 'collection'
+    parameter_name = 'collection'
+    placeholder = 'ID or name prefix'
+
+    def queryset(self, request, queryset):
+        value = (self.value() or '').strip()
+        if not value:
+            return queryset
+        if value.isdigit():
+            return queryset.filter(collection_id=value)
+        return queryset.filter(collection_id__in=_collections_named(value))
+
+
+@admin.register(CollectionTemplate)
+class CollectionTemplateAdmin(admin.ModelAdmin):
+    list_display = ['name', 'slug', 'updated_at']
+    search_fields = ['name']
+    prepopulated_fields = {'slug': ['name']}
+    readonly_fields = ['created_at', 'updated_at']
 
 
 @admin.register(Collection)
-class CollectionAdmin(admin.ModelAdmin):
-    list_display = ['name', 'created_by', 'visibility', 'created_at']
-    list_filter = ['visibility', 'created_at']
-    search_fields = ['name', 'description']
+class CollectionAdmin(ScalableAdmin):
+    list_display = ['name', 'created_by', 'visibility', 'template', 'created_at']
+    list_filter = ['visibility', 'template', 'created_at']
+    list_select_related = ['created_by', 'template']
+    search_fields = ['name']
+    search_help_text = 'Collection name prefix or exact owner username (case-sensitive)'
+    autocomplete_fields = ['created_by']
     readonly_fields = ['created_at', 'updated_at']
 
+    def search_q(self, term):
+        return Q(name__startswith=term) | Q(created_by_id__in=_users_named(term))
+
 
 @admin.register(Item)
-class ItemAdmin(admin.ModelAdmin):
+class ItemAdmin(ScalableAdmin):
     list_display = ['name', 'collection', 'created_by', 'visibility', 'created_at']
-    list_filter = ['visibility', 'created_at', 'collection']
-    search_fields = ['name', 'description']
+    list_filter = ['visibility', 'created_at', CollectionFilter]
+    # Collection.__str__ includes the owner's username
+    list_select_related = ['collection__created_by', 'created_by']
+    search_fields = ['fingerprint_name']
+    search_help_text = 'Item name prefix or ISBN'
+    autocomplete_fields = ['collection', 'created_by']
     readonly_fields = ['created_at', 'updated_at']
 
+    def search_q(self, term):
+        # The indexed fingerprint columns hold normalized values, so any case matches
+        isbn = normalize_isbn(term)
+        if isbn:
+            return Q(fingerprint_isbn=isbn)
+        return Q(fingerprint_name__startswith=normalize_name(term))
+
 
 @admin.register(CollectionShare)
-class CollectionShareAdmin(admin.ModelAdmin):
+class CollectionShareAdmin(ScalableAdmin):
     list_display = ['collection', 'shared_with', 'permission_level', 'created_by', 'created_at']
+    list_filter = ['permission_level', 'created_at', CollectionFilter]
+    list_select_related = ['collection__created_by', 'shared_with', 'created_by']
+    search_fields = ['shared_with__username']
+    search_help_text = 'Exact username or collection name prefix (case-sensitive)'
+    autocomplete_fields = ['collection', 'shared_with', 'created_by']
+    readonly_fields = ['created_at']
+
+    def search_q(self, term):
+        return Q(shared_with_id__in=_users_named(term)) | Q(collection_id__in=_collections_named(term))
+
+
+@admin.register(ShareGroup)
+class ShareGroupAdmin(admin.ModelAdmin):
+    list_display = ['name', 'owner', 'created_at']
+    search_fields = ['name', 'owner__username']
+    filter_horizontal = ['members']
+    readonly_fields = ['created_at']
+
+
+@admin.register(CollectionGroupShare)
+class CollectionGroupShareAdmin(admin.ModelAdmin):
+    list_display = ['collection', 'group', 'permission_level', 'created_by', 'created_at']
     list_filter = ['permission_level', 'created_at']
-    search_fields = ['collection__name', 'shared_with__username']
+    search_fields = ['collection__name', 'group__name']
     readonly_fields = ['created_at']
@@ -0,0 +1,18 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from . import views
+
+router = DefaultRouter()
+router.register(r'collections', views.CollectionViewSet, basename='collection')
+router.register(r'items', views.ItemViewSet, basename='item')
+router.register(r'share-groups', views.ShareGroupViewSet, basename='share-group')
+router.register(r'templates', views.CollectionTemplateViewSet)
+router.register(r'users', views.UserViewSet)
+
+urlpatterns = [
+    path('collections/<int:pk>/events/', views.collection_events, name='collection-events'),
+    path('', include(router.urls)),
+    path('auth/register/', views.register, name='register'),
+    path('auth/login/', views.login, name='login'),
+    path('auth/logout/', views.logout, name='logout'),
+]
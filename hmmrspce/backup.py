@@ -0,0 +1,313 @@
+"""
+Streaming backup and restore of a user's collections.
+
+An archive is a zip file containing:
+
+- ``manifest.json`` with the format version and export scope
+- ``collections.ndjson``, ``items.ndjson`` and ``shares.ndjson``, one JSON
+  object per line
+- ``blobs/<sha256>``, one copy of each distinct image file
+
+Export and restore both work row by row, so memory stays flat regardless
+of how many items an account has.
+"""
+import datetime
+import hashlib
+import io
+import json
+import os
+import re
+import zipfile
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .cloning import unique_collection_name
+from .models import Collection, CollectionShare, CollectionTemplate, Item
+from .schemas import get_template_validator
+
+FORMAT_VERSION = 1
+BATCH_SIZE = 1000
+CHUNK_SIZE = 64 * 1024
+HEX_DIGEST = re.compile(r'[0-9a-f]{64}')
+
+COLLECTION_FIELDS = ('id', 'name', 'description', 'visibility', 'template_id', 'created_at')
+ITEM_FIELDS = ('id', 'collection_id', 'name', 'description', 'image', 'custom_fields', 'visibility', 'created_at')
+
+
+class BackupError(Exception):
+    pass
+
+
+class _Drain(io.RawIOBase):
+    """Unseekable sink that zipfile writes into and the export generator empties"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class _Encoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder truncates to milliseconds; keep exact timestamps
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _line(row):
+    return (json.dumps(row, cls=_Encoder, separators=(',', ':')) + '\n').encode()
+
+
+def _image_hash(storage, name):
+    digest = hashlib.sha256()
+    with storage.open(name) as source:
+        for chunk in source.chunks(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_archive(user, collection_ids=None):
+    """
+    Yield a backup archive of the user's collections as byte chunks.
+
+    ``collection_ids`` limits the export to some of the user's collections.
+    """
+    collections = Collection.objects.filter(created_by=user)
+    if collection_ids is not None:
+        collections = collections.filter(pk__in=collection_ids)
+    collection_ids = list(collections.values_list('pk', flat=True))
+
+    items = Item.objects.filter(collection_id__in=collection_ids).order_by('pk')
+    shares = CollectionShare.objects.filter(collection_id__in=collection_ids).order_by('pk')
+    storage = Item._meta.get_field('image').storage
+
+    drain = _Drain()
+    with zipfile.ZipFile(drain, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('manifest.json', json.dumps({
+            'version': FORMAT_VERSION,
+            'exported_at': timezone.now().isoformat(),
+            'username': user.username,
+            'collections': len(collection_ids),
+        }))
+        yield drain.pop()
+
+        with archive.open('collections.ndjson', 'w') as out:
+            for row in collections.order_by('pk').values(*COLLECTION_FIELDS).iterator(BATCH_SIZE):
+                out.write(_line(row))
+        yield drain.pop()
+
+        image_hashes = {}
+        with archive.open('items.ndjson', 'w') as out:
+            for count, row in enumerate(items.values(*ITEM_FIELDS).iterator(BATCH_SIZE), 1):
+                name = row.pop('image')
+                if name and name not in image_hashes and storage.exists(name):
+                    image_hashes[name] = _image_hash(storage, name)
+                row['image_blob'] = image_hashes.get(name)
+                row['image_name'] = os.path.basename(name) if name else None
+                out.write(_line(row))
+                if count % BATCH_SIZE == 0:
+                    yield drain.pop()
+        yield drain.pop()
+
+        with archive.open('shares.ndjson', 'w') as out:
+            for row in shares.values('collection_id', 'shared_with__username', 'permission_level').iterator(BATCH_SIZE):
+                out.write(_line(row))
+        yield drain.pop()
+
+        # Each distinct file is stored once, however many items use it
+        written = set()
+        for name, digest in image_hashes.items():
+            if digest in written:
+                continue
+            written.add(digest)
+            with archive.open(f'blobs/{digest}', 'w') as out, storage.open(name) as source:
+                for chunk in source.chunks(CHUNK_SIZE):
+                    out.write(chunk)
+                    yield drain.pop()
+    yield drain.pop()
+
+
+async def aiter_archive(user, collection_ids=None):
+    """
+    Async version of iter_archive for ASGI responses.
+
+    Django would otherwise consume a sync iterator into a list before
+    sending it, buffering the whole archive in memory. Each chunk is
+    produced in the thread-sensitive sync thread, where the ORM can run.
+    """
+    chunks = iter_archive(user, collection_ids)
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    done = object()
+    while (chunk := await next_chunk(chunks, done)) is not done:
+        yield chunk
+
+
+def _rows(archive, name):
+    with archive.open(name) as source:
+        for line in io.TextIOWrapper(source, encoding='utf-8'):
+            if line.strip():
+                yield json.loads(line)
+
+
+def restore_archive(fileobj, user):
+    """
+    Restore a backup archive into the user's account.
+
+    Collections get new ids (and a new name if one is taken); items are
+    bulk-inserted in batches and remapped to the new collections, keeping
+    their original creation times. Shares are restored for users that still
+    exist. Choice fields and template custom fields are validated. Nothing is kept if the archive turns out to be invalid, including
+    image files already saved.
+    """
+    try:
+        archive = zipfile.ZipFile(fileobj)
+        manifest = json.loads(archive.read('manifest.json'))
+    except (zipfile.BadZipFile, KeyError, ValueError):
+        raise BackupError('Not a valid backup archive')
+    if not isinstance(manifest, dict) or manifest.get('version') != FORMAT_VERSION:
+        version = manifest.get('version') if isinstance(manifest, dict) else None
+        raise BackupError(f"Unsupported backup version {version}")
+
+    storage = Item._meta.get_field('image').storage
+    stored_blobs = {}
+    try:
+        with transaction.atomic():
+            return _restore(archive, user, storage, stored_blobs)
+    except (KeyError, ValueError, TypeError, AttributeError, zipfile.BadZipFile) as e:
+        _delete_files(storage, stored_blobs.values())
+        raise BackupError(f'Invalid backup archive: {e.__class__.__name__} {e}')
+    except BaseException:
+        _delete_files(storage, stored_blobs.values())
+        raise
+
+
+def _delete_files(storage, names):
+    for name in names:
+        storage.delete(name)
+
+
+def _created_at(value):
+    created_at = parse_datetime(value) if isinstance(value, str) else None
+    if created_at is None:
+        raise ValueError(f'invalid created_at {value!r}')
+    return created_at
+
+
+def _check_choice(model, field, value):
+    if value not in {choice for choice, _ in model._meta.get_field(field).choices}:
+        raise BackupError(f'Invalid {field} {value!r} in backup archive')
+
+
+def _restore(archive, user, storage, stored_blobs):
+    templates = CollectionTemplate.objects.in_bulk()
+    collections = {}
+    validators = {}
+    counts = {'collections': 0, 'items': 0, 'shares': 0, 'images': 0}
+
+    for row in _rows(archive, 'collections.ndjson'):
+        _check_choice(Collection, 'visibility', row['visibility'])
+        template = templates.get(row['template_id'])
+        collection = Collection.objects.create(
+            name=unique_collection_name(row['name'], user),
+            description=row['description'],
+            visibility=row['visibility'],
+            template=template,
+            created_by=user,
+        )
+        if template is not None:
+            validators[collection.pk] = get_template_validator(template)
+        # auto_now_add overrides the value on insert, so restore it afterwards
+        Collection.objects.filter(pk=collection.pk).update(created_at=_created_at(row['created_at']))
+        collections[row['id']] = collection
+        counts['collections'] += 1
+
+    batch = []
+    for row in _rows(archive, 'items.ndjson'):
+        if row['collection_id'] not in collections:
+            continue
+        _check_choice(Item, 'visibility', row['visibility'])
+        collection = collections[row['collection_id']]
+        if not isinstance(row['custom_fields'], dict):
+            raise BackupError(f"Invalid custom fields for item {row['name']!r} in backup archive")
+        if collection.pk in validators:
+            errors = validators[collection.pk](row['custom_fields'])
+            if errors:
+                raise BackupError(f"Item {row['name']!r} doesn't match its collection's template: {errors}")
+        blob = row['image_blob']
+        if blob and blob not in stored_blobs:
+            if not HEX_DIGEST.fullmatch(blob):
+                raise BackupError('Invalid image reference in backup archive')
+            filename = os.path.basename(row['image_name'] or '') or 'image'
+            with archive.open(f'blobs/{blob}') as source:
+                stored_blobs[blob] = storage.save(f'items/{filename}', File(source))
+            counts['images'] += 1
+
+        item = Item(
+            collection=collection,
+            created_by=user,
+            name=row['name'],
+            description=row['description'],
+            image=stored_blobs.get(blob) or '',
+            custom_fields=row['custom_fields'],
+            visibility=row['visibility'],
+        )
+        item.sync_derived_fields()
+        batch.append((item, _created_at(row['created_at'])))
+        if len(batch) >= BATCH_SIZE:
+            counts['items'] += _insert_items(batch)
+            batch = []
+    counts['items'] += _insert_items(batch)
+
+    batch = []
+    for row in _rows(archive, 'shares.ndjson'):
+        _check_choice(CollectionShare, 'permission_level', row['permission_level'])
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            counts['shares'] += _restore_shares(batch, collections, user)
+            batch = []
+    counts['shares'] += _restore_shares(batch, collections, user)
+
+    return counts
+
+
+def _insert_items(batch):
+    items = Item.objects.bulk_create([item for item, _ in batch])
+    # bulk_create stamps created_at with the current time; put the exported values back
+    for item, (_, created_at) in zip(items, batch):
+        item.created_at = created_at
+    Item.objects.bulk_update(items, ['created_at'])
+    return len(items)
+
+
+def _restore_shares(rows, collections, user):
+    users = dict(User.objects.filter(
+        username__in={row['shared_with__username'] for row in rows}
+    ).exclude(pk=user.pk).values_list('username', 'pk'))
+    shares = [
+        CollectionShare(
+            collection=collections[row['collection_id']],
+            shared_with_id=users[row['shared_with__username']],
+            permission_level=row['permission_level'],
+            created_by=user,
+        )
+        for row in rows
+        if row['shared_with__username'] in users and row['collection_id'] in collections
+    ]
+    CollectionShare.objects.bulk_create(shares)
+    return len(shares)
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+PROCESS_LOCAL_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+}
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """Cache invalidation bumps version keys, which only works if every process shares the cache"""
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend in PROCESS_LOCAL_CACHES:
+        return [Warning(
+            'The default cache is local to each process.',
+            hint='Stats and discovery feed invalidations made by one worker or management command '
+                 'will not reach the others. Configure a shared cache such as DatabaseCache or Redis.',
+            id='hmmrspce.W001',
+        )]
+    return []
@@ -0,0 +1,64 @@
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import Collection, Item
+
+
+def unique_collection_name(name, user):
+    """Pick a collection name that doesn't collide with the user's existing ones"""
+    name = name[:190]
+    existing = set(
+        Collection.objects.filter(created_by=user, name__startswith=name).values_list('name', flat=True)
+    )
+    candidate = name
+    suffix = 2
+    while candidate in existing:
+        candidate = f"{name} ({suffix})"
+        suffix += 1
+    return candidate
+
+
+def _copy_items_sql(include_private):
+    qn = connection.ops.quote_name
+    table = qn(Item._meta.db_table)
+    copied = ['name', 'description', 'image', 'custom_fields', 'visibility', 'fingerprint_isbn',
+              'fingerprint_name', 'simhash', 'simhash_band0', 'simhash_band1', 'simhash_band2',
+              'simhash_band3']
+    columns = copied + ['is_public', 'collection_id', 'created_by_id', 'created_at', 'updated_at']
+    select = [qn(column) for column in copied] + [
+        f"CASE WHEN {qn('visibility')} = 'public' THEN %s "
+        f"WHEN {qn('visibility')} = 'collection' THEN %s ELSE %s END",
+        '%s', '%s', '%s', '%s',
+    ]
+    where = f"{qn('collection_id')} = %s"
+    if not include_private:
+        where += f" AND {qn('visibility')} <> 'private'"
+    return (
+        f"INSERT INTO {table} ({', '.join(qn(column) for column in columns)}) "
+        f"SELECT {', '.join(select)} FROM {table} WHERE {where}"
+    )
+
+
+def clone_collection(source, user, name=None, include_private=True):
+    """
+    Copy a collection and its items to ``user`` in one transaction.
+
+    Items are copied with a single ``INSERT ... SELECT`` so no rows pass
+    through Python. Images are shared by reference: the clone points at the
+    same stored file rather than duplicating it.
+    """
+    with transaction.atomic():
+        clone = Collection.objects.create(
+            name=unique_collection_name(name or f"{source.name} (copy)", user),
+            description=source.description,
+            visibility='private',
+            template_id=source.template_id,
+            created_by=user,
+        )
+        # Raw SQL skips field adaptation; store timestamps in the backend's usual format
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        with connection.cursor() as cursor:
+            cursor.execute(
+                _copy_items_sql(include_private),
+                [True, clone.is_public, False, clone.id, user.id, now, now, source.id],
+            )
+    return clone
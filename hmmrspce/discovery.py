@@ -0,0 +1,157 @@
+"""
+Public discovery feeds.
+
+Ranking keys for public collections are precomputed into DiscoveryRanking
+by refresh_rankings (run periodically with refresh_discovery_feeds). Feed
+pages are keyset-paginated index scans over that table, and each page is
+cached until the next refresh, so serving a page doesn't depend on how
+many public collections there are. Collections that stop being public or
+are deleted are withdrawn immediately rather than at the next refresh.
+"""
+import base64
+import json
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Collection, DiscoveryRanking
+from .serializers import PublicCollectionSerializer
+
+DISCOVERY_CACHE_TIMEOUT = 15 * 60
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Feed name -> DiscoveryRanking field it is ordered by (descending)
+FEEDS = {
+    'recent': 'last_activity_at',
+    'popular': 'public_items_count',
+}
+_VERSION_KEY = 'discovery-feeds-version'
+# Bumped when the page format changes, so pages cached in the old format are skipped
+PAGE_FORMAT = 2
+
+
+def get_feeds_version():
+    return cache.get_or_set(_VERSION_KEY, time.time_ns(), None)
+
+
+def invalidate_feeds():
+    """Start a new feeds version, so pages cached until now are never served again"""
+    cache.set(_VERSION_KEY, time.time_ns(), None)
+
+
+def withdraw(collection_id):
+    """Remove a collection from the feeds without waiting for the next refresh"""
+    deleted, _ = DiscoveryRanking.objects.filter(collection_id=collection_id).delete()
+    if deleted:
+        transaction.on_commit(invalidate_feeds)
+
+
+def refresh_rankings(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Recompute ranking keys for every public collection.
+
+    Collections are aggregated in primary key batches and upserted; rankings
+    of collections that are no longer public are removed. Returns the number
+    of ranked collections.
+    """
+    refreshed_at = timezone.now()
+    public = Collection.objects.filter(visibility='public').order_by('pk').annotate(
+        public_items=Count('items', filter=Q(items__is_public=True)),
+        last_item_at=Max('items__updated_at'),
+    ).values_list('pk', 'template_id', 'updated_at', 'public_items', 'last_item_at')
+
+    ranked = 0
+    last_pk = 0
+    while True:
+        rows = list(public.filter(pk__gt=last_pk)[:batch_size])
+        if not rows:
+            break
+        DiscoveryRanking.objects.bulk_create(
+            [
+                DiscoveryRanking(
+                    collection_id=pk,
+                    template_id=template_id,
+                    public_items_count=public_items,
+                    last_activity_at=max(updated_at, last_item_at or updated_at),
+                    refreshed_at=refreshed_at,
+                )
+                for pk, template_id, updated_at, public_items, last_item_at in rows
+            ],
+            update_conflicts=True,
+            unique_fields=['collection'],
+            update_fields=['template', 'public_items_count', 'last_activity_at', 'refreshed_at'],
+        )
+        ranked += len(rows)
+        last_pk = rows[-1][0]
+
+    with transaction.atomic():
+        DiscoveryRanking.objects.filter(refreshed_at__lt=refreshed_at).delete()
+    invalidate_feeds()
+    return ranked
+
+
+def encode_cursor(value, pk):
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    return base64.urlsafe_b64encode(json.dumps([value, pk]).encode()).decode()
+
+
+def decode_cursor(cursor, feed):
+    """Return the (value, pk) position encoded in a cursor; raises ValueError if malformed"""
+    try:
+        value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError):
+        raise ValueError('Invalid cursor')
+    if feed == 'recent':
+        value = parse_datetime(value) if isinstance(value, str) else None
+    elif not isinstance(value, int) or isinstance(value, bool):
+        value = None
+    if value is None or not isinstance(pk, int) or isinstance(pk, bool):
+        raise ValueError('Invalid cursor')
+    return value, pk
+
+
+def get_feed_page(feed, template=None, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    One page of a discovery feed as ``{'results': [...], 'next_cursor': ...}``.
+
+    ``template`` is a template slug restricting the feed to collections
+    created from it. Raises ValueError for an unknown feed or bad cursor.
+    """
+    if feed not in FEEDS:
+        raise ValueError(f'Unknown feed {feed!r}')
+    key = f'discovery:{PAGE_FORMAT}:{get_feeds_version()}:{feed}:{template or ""}:{page_size}:{cursor or ""}'
+    page = cache.get(key)
+    if page is not None:
+        return page
+
+    field = FEEDS[feed]
+    rankings = DiscoveryRanking.objects.filter(
+        collection__visibility='public', collection__deleted_at__isnull=True
+    )
+    if template:
+        rankings = rankings.filter(template__slug=template)
+    if cursor:
+        value, pk = decode_cursor(cursor, feed)
+        rankings = rankings.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'collection_id__lt': pk}))
+
+    rows = list(rankings.select_related('collection__created_by')
+                .order_by(f'-{field}', '-collection_id')[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    collections = []
+    for ranking in rows:
+        ranking.collection.public_items_count = ranking.public_items_count
+        collections.append(ranking.collection)
+
+    page = {
+        'results': PublicCollectionSerializer(collections, many=True).data,
+        'next_cursor': encode_cursor(getattr(rows[-1], field), rows[-1].collection_id) if has_more else None,
+    }
+    cache.set(key, page, DISCOVERY_CACHE_TIMEOUT)
+    return page
@@ -0,0 +1,166 @@
+from django.db.models import Count
+from . import fingerprints
+
+
+ITEM_SUMMARY_FIELDS = ('id', 'name', 'collection_id', 'collection__name')
+EXACT_KEYS = [
+    ('isbn', 'fingerprint_isbn'),
+    ('name', 'fingerprint_name'),
+]
+BAND_FIELDS = [f'simhash_band{i}' for i in range(fingerprints.SIMHASH_BANDS)]
+# Band buckets with more items than this are not compared (see _similar_buckets)
+MAX_BUCKET_SIZE = 50
+
+
+def _summary(row):
+    return {
+        'id': row['id'],
+        'name': row['name'],
+        'collection': row['collection_id'],
+        'collection_name': row['collection__name'],
+    }
+
+
+def _exact_groups(items, reason, field):
+    keys = (
+        items.exclude(**{field: ''})
+        .values(field).annotate(n=Count('id')).filter(n__gt=1)
+        .values_list(field, flat=True)
+    )
+    groups = {}
+    for row in items.filter(**{f'{field}__in': keys}).values(field, *ITEM_SUMMARY_FIELDS):
+        groups.setdefault(row[field], []).append(_summary(row))
+    return [{'reason': reason, 'key': key, 'items': members} for key, members in groups.items()]
+
+
+def _similar_buckets(items):
+    """
+    Yield lists of candidate rows that share a value in one simhash band.
+
+    Buckets larger than MAX_BUCKET_SIZE are skipped: a band value that common
+    says nothing about similarity, and near-duplicates still share one of
+    the other bands.
+    """
+    items = items.exclude(simhash=0)
+    for band in BAND_FIELDS:
+        values = (
+            items.values(band).annotate(n=Count('id')).filter(n__gt=1, n__lte=MAX_BUCKET_SIZE)
+            .values_list(band, flat=True)
+        )
+        buckets = {}
+        for row in items.filter(**{f'{band}__in': values}).values(band, 'simhash', *ITEM_SUMMARY_FIELDS):
+            buckets.setdefault(row[band], []).append(row)
+        yield from buckets.values()
+
+
+def _is_similar(first, second):
+    return (fingerprints.hamming(first['simhash'], second['simhash']) <= fingerprints.SIMILARITY_THRESHOLD
+            and fingerprints.name_numbers(first['name']) == fingerprints.name_numbers(second['name']))
+
+
+def find_duplicates(items):
+    """
+    Find duplicate items in a queryset.
+
+    Returns groups of items sharing an ISBN or normalized name, then groups
+    of near-duplicates by simhash that aren't already covered by those.
+    """
+    groups = []
+    for reason, field in EXACT_KEYS:
+        groups.extend(_exact_groups(items, reason, field))
+
+    exact_groups = {}
+    for index, group in enumerate(groups):
+        for item in group['items']:
+            exact_groups.setdefault(item['id'], set()).add(index)
+
+    # Union-find over candidates; pairs are compared bucket by bucket, never collected
+    parent = {}
+    candidates = {}
+
+    def root(node):
+        while parent.setdefault(node, node) != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for bucket in _similar_buckets(items):
+        for i, first in enumerate(bucket):
+            for second in bucket[i + 1:]:
+                if root(first['id']) == root(second['id']):
+                    continue
+                if exact_groups.get(first['id'], set()) & exact_groups.get(second['id'], set()):
+                    continue
+                if _is_similar(first, second):
+                    candidates[first['id']] = first
+                    candidates[second['id']] = second
+                    parent[root(first['id'])] = root(second['id'])
+
+    clusters = {}
+    for node in candidates:
+        clusters.setdefault(root(node), []).append(node)
+    for members in clusters.values():
+        if len(members) > 1:
+            groups.append({
+                'reason': 'similar',
+                'key': None,
+                'items': [_summary(candidates[pk]) for pk in sorted(members)],
+            })
+    return groups
+
+
+def find_matches(items, new):
+    """
+    Check fingerprints of items about to be created against existing ones.
+
+    ``new`` is a list of fingerprint dicts as returned by fingerprints.compute,
+    plus the item's ``name``.
+    Existing matches are looked up with one indexed query per key, and items
+    within the batch are checked against each other. Returns one entry per
+    new item that has a duplicate.
+    """
+    existing = {}
+    for reason, field in EXACT_KEYS:
+        keys = {values[field] for values in new if values[field]}
+        existing[reason] = dict(items.filter(**{f'{field}__in': keys}).values_list(field, 'id'))
+
+    buckets = {}
+    for band in BAND_FIELDS:
+        keys = {values[band] for values in new if values['simhash']}
+        candidates = items.exclude(simhash=0).filter(**{f'{band}__in': keys})
+        oversized = (candidates.values(band).annotate(n=Count('id')).filter(n__gt=MAX_BUCKET_SIZE)
+                     .values_list(band, flat=True))
+        rows = candidates.exclude(**{f'{band}__in': oversized}).values_list(band, 'id', 'simhash', 'name')
+        for key, pk, value, name in rows:
+            buckets.setdefault((band, key), []).append((pk, value, fingerprints.name_numbers(name)))
+
+    matches = []
+    seen = {reason: {} for reason, _ in EXACT_KEYS}
+    for index, values in enumerate(new):
+        match = None
+        for reason, field in EXACT_KEYS:
+            key = values[field]
+            if not key:
+                continue
+            if key in existing[reason]:
+                match = {'index': index, 'reason': reason, 'item': existing[reason][key]}
+            elif key in seen[reason]:
+                match = {'index': index, 'reason': reason, 'duplicate_of_index': seen[reason][key]}
+            else:
+                seen[reason][key] = index
+            if match:
+                break
+
+        if match is None and values['simhash']:
+            for band in BAND_FIELDS:
+                for pk, value, numbers in buckets.get((band, values[band]), []):
+                    if (fingerprints.hamming(value, values['simhash']) <= fingerprints.SIMILARITY_THRESHOLD
+                            and numbers == fingerprints.name_numbers(values['name'])):
+                        match = {'index': index, 'reason': 'similar', 'item': pk}
+                        break
+                if match:
+                    break
+
+        if match:
+            matches.append(match)
+    return matches
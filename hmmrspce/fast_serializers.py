@@ -0,0 +1,155 @@
+"""
+Read-only list serializers built on ``.values()`` rows.
+
+They produce the same output as their ModelSerializer counterparts but skip
+model instantiation and per-field serializer dispatch, and pass the stored
+``custom_fields`` JSON through to the renderer without decoding it.
+"""
+from django.db.models import TextField
+from django.db.models.functions import Cast
+from rest_framework import serializers
+from .models import Item, CollectionShare, CollectionGroupShare, PERMISSION_RANK
+from .renderers import raw_json
+
+
+_datetime = serializers.DateTimeField()
+_image_storage = Item._meta.get_field('image').storage
+
+
+def _image_url(name, request):
+    if not name:
+        return None
+    url = _image_storage.url(name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def collection_permissions(user, collections):
+    """
+    Map collection id to the user's permission level, as Collection.get_user_permission does.
+
+    ``collections`` is an iterable of (id, created_by_id, visibility) tuples;
+    shares for all of them are resolved with one query.
+    """
+    collections = {pk: (owner_id, visibility) for pk, owner_id, visibility in collections}
+    shared = {}
+    if user is not None and user.is_authenticated:
+        direct = CollectionShare.objects.filter(
+            collection_id__in=list(collections), shared_with=user
+        ).values_list('collection_id', 'permission_level')
+        grouped = CollectionGroupShare.objects.filter(
+            collection_id__in=list(collections), group__members=user
+        ).values_list('collection_id', 'permission_level')
+        for collection_id, level in direct.union(grouped, all=True):
+            if PERMISSION_RANK[level] > PERMISSION_RANK.get(shared.get(collection_id), 0):
+                shared[collection_id] = level
+
+    permissions = {}
+    for pk, (owner_id, visibility) in collections.items():
+        if user is not None and owner_id == user.id:
+            permissions[pk] = 'owner'
+        elif pk in shared:
+            permissions[pk] = shared[pk]
+        elif visibility == 'public':
+            permissions[pk] = 'view'
+        else:
+            permissions[pk] = None
+    return permissions
+
+
+class FastItemSerializer:
+    """Fast equivalent of ItemSerializer for list responses"""
+
+    fields = (
+        'id', 'name', 'description', 'image', 'visibility', 'is_public',
+        'collection_id', 'collection__name', 'collection__created_by_id', 'collection__visibility',
+        'created_by_id', 'created_by__username', 'created_by__email',
+        'created_by__first_name', 'created_by__last_name', 'created_at', 'updated_at',
+    )
+
+    @classmethod
+    def rows(cls, queryset):
+        """Turn an Item queryset into the flat rows this serializer consumes"""
+        return queryset.values(*cls.fields, custom_fields_json=Cast('custom_fields', TextField()))
+
+    def __init__(self, rows, context=None):
+        self.rows = rows
+        self.context = context or {}
+
+    def get_permissions(self, rows):
+        request = self.context.get('request')
+        user = getattr(request, 'user', None)
+        collections = {
+            (row['collection_id'], row['collection__created_by_id'], row['collection__visibility'])
+            for row in rows
+        }
+        return user, collection_permissions(user, collections)
+
+    @property
+    def data(self):
+        rows = list(self.rows)
+        request = self.context.get('request')
+        user, permissions = self.get_permissions(rows)
+        user_id = getattr(user, 'id', None)
+        return [self.to_representation(row, request, user_id, permissions) for row in rows]
+
+    def to_representation(self, row, request, user_id, permissions):
+        # Mirrors Item.get_user_permission
+        if row['created_by_id'] == user_id:
+            permission = 'owner'
+        elif row['visibility'] == 'public':
+            permission = 'view'
+        elif row['visibility'] == 'collection':
+            permission = permissions[row['collection_id']]
+        else:
+            permission = None
+
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'description': row['description'],
+            'image': _image_url(row['image'], request),
+            'custom_fields': raw_json(row['custom_fields_json']),
+            'visibility': row['visibility'],
+            'is_public': row['is_public'],
+            'collection': row['collection_id'],
+            'collection_name': row['collection__name'],
+            'created_by': self.created_by(row),
+            'created_at': _datetime.to_representation(row['created_at']),
+            'updated_at': _datetime.to_representation(row['updated_at']),
+            'user_permission': permission,
+        }
+
+    @staticmethod
+    def created_by(row):
+        return {
+            'id': row['created_by_id'],
+            'username': row['created_by__username'],
+            'email': row['created_by__email'],
+            'first_name': row['created_by__first_name'],
+            'last_name': row['created_by__last_name'],
+        }
+
+
+class FastPublicItemSerializer(FastItemSerializer):
+    """Fast equivalent of PublicItemSerializer"""
+
+    def get_permissions(self, rows):
+        return None, {}
+
+    def to_representation(self, row, request, user_id, permissions):
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'description': row['description'],
+            'image': _image_url(row['image'], request),
+            'custom_fields': raw_json(row['custom_fields_json']),
+            'collection_name': row['collection__name'],
+            'created_by': self.public_created_by(row),
+            'created_at': _datetime.to_representation(row['created_at']),
+        }
+
+    @classmethod
+    def public_created_by(cls, row):
+        created_by = cls.created_by(row)
+        del created_by['email']
+        return created_by
@@ -0,0 +1,138 @@
+"""
+Normalized fingerprints used to spot duplicate items.
+
+Exact keys (ISBN, normalized name) are compared for equality. The simhash
+of name and description catches near-duplicates: it is split into bands so
+candidates are found with indexed equality lookups instead of comparing
+every pair of items.
+"""
+import hashlib
+import re
+import unicodedata
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4
+BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+# Hashes within this Hamming distance are near-duplicates. With four bands,
+# any two such hashes share at least one identical band (pigeonhole).
+SIMILARITY_THRESHOLD = SIMHASH_BANDS - 1
+# Name tokens with digits (issue numbers, volumes, years) usually tell items of
+# a series apart, so they outweigh the words the series shares
+NUMBER_WEIGHT = 8
+
+ISBN_KEYS = ('isbn', 'isbn13', 'isbn_13', 'isbn10', 'isbn_10')
+_ARTICLES = {'a', 'an', 'the'}
+_STOPWORDS = _ARTICLES | {'and', 'or', 'of', 'in', 'on', 'by', 'for', 'to', 'with', 'about', 'is', 'this'}
+_WORD = re.compile(r'\w+')
+
+
+def _words(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _WORD.findall(text.lower())
+
+
+def normalize_name(name):
+    """Lowercase, accent- and punctuation-free name without surrounding articles"""
+    words = _words(name)
+    # Drop articles at either end, so "The Hobbit" and "Hobbit, The" match
+    while words and words[0] in _ARTICLES:
+        words = words[1:]
+    while words and words[-1] in _ARTICLES:
+        words = words[:-1]
+    return ' '.join(words)[:200]
+
+
+def _isbn10_to_13(isbn10):
+    body = '978' + isbn10[:9]
+    total = sum(int(digit) * (1 if i % 2 == 0 else 3) for i, digit in enumerate(body))
+    return body + str((10 - total % 10) % 10)
+
+
+def normalize_isbn(value):
+    """Return the ISBN-13 form of an ISBN-10/13 value, or '' if it isn't one"""
+    if not isinstance(value, (str, int)):
+        return ''
+    isbn = re.sub(r'[^0-9Xx]', '', str(value)).upper()
+    if len(isbn) == 10 and isbn[:9].isdigit():
+        return _isbn10_to_13(isbn)
+    if len(isbn) == 13 and isbn.isdigit():
+        return isbn
+    return ''
+
+
+def isbn_from_custom_fields(custom_fields):
+    if not isinstance(custom_fields, dict):
+        return ''
+    for key in ISBN_KEYS:
+        if custom_fields.get(key):
+            return normalize_isbn(custom_fields[key])
+    return ''
+
+
+def _token_hash(token):
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), 'big')
+
+
+def name_numbers(name):
+    """Sorted digit-bearing tokens of a name; items whose numbers differ are never near-duplicates"""
+    return sorted(word for word in _words(name) if any(ch.isdigit() for ch in word))
+
+
+def simhash(name, description=''):
+    """
+    64-bit simhash of name and description words, ignoring stopwords.
+
+    Name words count double, and name tokens with digits NUMBER_WEIGHT.
+    """
+    weights = {}
+    for word in _words(name):
+        if word not in _STOPWORDS:
+            weight = NUMBER_WEIGHT if any(ch.isdigit() for ch in word) else 2
+            weights[word] = weights.get(word, 0) + weight
+    for word in _words(description):
+        if word not in _STOPWORDS:
+            weights[word] = weights.get(word, 0) + 1
+    if not weights:
+        return 0
+
+    vector = [0] * SIMHASH_BITS
+    for token, weight in weights.items():
+        value = _token_hash(token)
+        for bit in range(SIMHASH_BITS):
+            vector[bit] += weight if value >> bit & 1 else -weight
+
+    result = 0
+    for bit in range(SIMHASH_BITS):
+        if vector[bit] > 0:
+            result |= 1 << bit
+    return to_signed(result)
+
+
+def to_signed(value):
+    """Fit an unsigned 64-bit hash into a signed BigIntegerField"""
+    return value - (1 << SIMHASH_BITS) if value >= 1 << (SIMHASH_BITS - 1) else value
+
+
+def bands(value):
+    """Split a simhash into SIMHASH_BANDS integers for indexed candidate lookup"""
+    value &= (1 << SIMHASH_BITS) - 1
+    mask = (1 << BAND_BITS) - 1
+    return [(value >> (i * BAND_BITS)) & mask for i in range(SIMHASH_BANDS)]
+
+
+def hamming(a, b):
+    return bin((a ^ b) & ((1 << SIMHASH_BITS) - 1)).count('1')
+
+
+def compute(name, description, custom_fields):
+    """All fingerprint column values for an item, keyed by model field name"""
+    value = simhash(name, description)
+    fields = {
+        'fingerprint_isbn': isbn_from_custom_fields(custom_fields),
+        'fingerprint_name': normalize_name(name),
+        'simhash': value,
+    }
+    for i, band in enumerate(bands(value)):
+        fields[f'simhash_band{i}'] = band
+    return fields
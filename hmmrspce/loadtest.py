@@ -0,0 +1,307 @@
+"""
+End-to-end load scenarios against a running server.
+
+Each scenario replays the requests the frontend (src/ts/api.ts) makes for
+one user action. Workers run scenarios in a loop over keep-alive HTTP
+connections and record the latency of every request.
+"""
+import http.client
+import importlib.util
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+from . import discovery
+from .models import Collection, Item
+from .purge import purge_user
+
+USER_PREFIX = 'loadtest-'
+
+
+def seed(users=10, collections_per_user=3, items_per_collection=200, fanout_users=20):
+    """
+    Create (or reuse) the load-test accounts and their data.
+
+    Returns the context scenarios draw from: tokens, collection and item ids.
+    """
+    context = {'users': [], 'fanout_usernames': []}
+    with transaction.atomic():
+        for i in range(users + fanout_users):
+            username = f'{USER_PREFIX}{i}'
+            user, _ = User.objects.get_or_create(username=username)
+            if i >= users:
+                context['fanout_usernames'].append(username)
+                continue
+            token, _ = Token.objects.get_or_create(user=user)
+
+            collection_ids = []
+            for c in range(collections_per_user):
+                collection, created = Collection.objects.get_or_create(
+                    name=f'Load test {c}', created_by=user,
+                    defaults={'visibility': 'public' if c == 0 else 'private'},
+                )
+                if created:
+                    items = []
+                    for n in range(items_per_collection):
+                        item = Item(
+                            collection=collection, created_by=user, name=f'Item {n}',
+                            description=f'Load test item {n} of {collection.name}',
+                            visibility='public' if n % 2 else 'collection',
+                            custom_fields={'author': f'Author {n % 40}', 'pages': 100 + n % 300,
+                                           'isbn': f'978{n:010d}'},
+                        )
+                        # bulk_create skips save(), which fills is_public and the fingerprints
+                        item.sync_derived_fields()
+                        items.append(item)
+                    Item.objects.bulk_create(items)
+                collection_ids.append(collection.pk)
+            import_collection, _ = Collection.objects.get_or_create(name='Load test imports', created_by=user)
+
+            context['users'].append({
+                'username': username,
+                'token': token.key,
+                'collections': collection_ids,
+                'import_collection': import_collection.pk,
+                'items': list(Item.objects.filter(collection_id__in=collection_ids)
+                              .values_list('pk', flat=True)[:100]),
+            })
+    context['public_collections'] = list(
+        Collection.objects.filter(created_by__username__startswith=USER_PREFIX, visibility='public')
+        .values_list('pk', flat=True)
+    )
+    # Rank the seeded public collections so the discovery scenario gets real pages
+    discovery.refresh_rankings()
+    return context
+
+
+def cleanup():
+    """Remove every load-test account and everything it created"""
+    users = list(User.objects.filter(username__startswith=USER_PREFIX))
+    for user in users:
+        purge_user(user)
+    return len(users)
+
+
+class Client:
+    """JSON client that records request latencies"""
+
+    def __init__(self, base_url, token=None, keep_alive=True):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+        if token:
+            self.headers['Authorization'] = f'Token {token}'
+        self.keep_alive = keep_alive
+        self.connection = None
+        self.samples = []  # (label, seconds, ok)
+
+    def request(self, method, path, data=None, label=None):
+        body = json.dumps(data) if data is not None else None
+        start = time.perf_counter()
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            self.connection.request(method, '/api' + path, body=body, headers=self.headers)
+            response = self.connection.getresponse()
+            payload = response.read()
+            ok = response.status < 400
+            if not self.keep_alive:
+                self.close()
+        except (OSError, http.client.HTTPException):
+            self.close()
+            payload, ok = b'', False
+        self.samples.append((label or f'{method} {path}', time.perf_counter() - start, ok))
+        return json.loads(payload) if ok and payload else None
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+# Scenarios: each runs one user action and returns nothing; latencies are in client.samples
+
+def browse_public(client, user, context, rng):
+    client.request('GET', '/collections/public/', label='GET /collections/public/')
+    if context['public_collections']:
+        collection = rng.choice(context['public_collections'])
+        client.request('GET', f'/items/public/?collection={collection}', label='GET /items/public/')
+
+
+def open_collection(client, user, context, rng):
+    collection = rng.choice(user['collections'])
+    client.request('GET', f'/collections/{collection}/', label='GET /collections/{id}/')
+    client.request('GET', f'/items/?collection={collection}', label='GET /items/?collection=')
+
+
+def edit_item(client, user, context, rng):
+    item = rng.choice(user['items'])
+    client.request('PATCH', f'/items/{item}/', {'description': f'Edited {rng.random()}'},
+                   label='PATCH /items/{id}/')
+
+
+def bulk_import(client, user, context, rng, size=50):
+    batch = rng.getrandbits(32)
+    client.request('POST', '/items/bulk/', {
+        'collection': user['import_collection'],
+        'items': [{'name': f'Imported {batch}-{n}', 'custom_fields': {'batch': batch}} for n in range(size)],
+    }, label='POST /items/bulk/')
+
+
+def share_fanout(client, user, context, rng):
+    collection = rng.choice(user['collections'])
+    usernames = context['fanout_usernames']
+    client.request('POST', f'/collections/{collection}/shares/bulk/', {
+        'grants': [{'username': username, 'permission_level': 'view'} for username in usernames],
+    }, label='POST /shares/bulk/ (grant)')
+    client.request('POST', f'/collections/{collection}/shares/bulk/', {'revoke': usernames},
+                   label='POST /shares/bulk/ (revoke)')
+
+
+SCENARIOS = {
+    'browse_public': browse_public,
+    'open_collection': open_collection,
+    'edit_item': edit_item,
+    'bulk_import': bulk_import,
+    'share_fanout': share_fanout,
+}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(pct / 100 * len(values)) - 1)]
+
+
+def run_scenario(scenario, base_url, context, concurrency=8, duration=10.0, seed_value=0, keep_alive=True):
+    """
+    Run a scenario from ``concurrency`` threads for ``duration`` seconds.
+
+    Each worker acts as one seeded user, so writes from different workers
+    don't contend on the same rows.
+    """
+    func = SCENARIOS[scenario]
+    deadline = time.perf_counter() + duration
+    clients = []
+
+    def worker(index):
+        user = context['users'][index % len(context['users'])]
+        client = Client(base_url, user['token'], keep_alive=keep_alive)
+        clients.append(client)
+        rng = random.Random(seed_value + index)
+        while time.perf_counter() < deadline:
+            func(client, user, context, rng)
+        client.close()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    samples = [sample for client in clients for sample in client.samples]
+    return summarize(samples, elapsed)
+
+
+def summarize(samples, elapsed):
+    by_label = {}
+    for label, seconds, ok in samples:
+        by_label.setdefault(label, []).append((seconds, ok))
+
+    def stats(rows):
+        latencies = sorted(seconds for seconds, _ in rows)
+        return {
+            'requests': len(rows),
+            'errors': sum(1 for _, ok in rows if not ok),
+            'rps': len(rows) / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p90_ms': percentile(latencies, 90) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'max_ms': (latencies[-1] if latencies else 0.0) * 1000,
+        }
+
+    return {
+        'total': stats([(seconds, ok) for _, seconds, ok in samples]),
+        'requests': {label: stats(rows) for label, rows in sorted(by_label.items())},
+    }
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def server_command(interface, port, workers=1):
+    """
+    Command line that serves the project through its WSGI or ASGI entry point.
+
+    Returns (command, keep_alive): the development server stalls on
+    keep-alive connections (delayed ACKs), so clients reconnect per request.
+    """
+    bind = f'127.0.0.1:{port}'
+    if interface == 'asgi':
+        if importlib.util.find_spec('uvicorn') is None:
+            raise RuntimeError('The ASGI server needs uvicorn: pip install uvicorn')
+        return [sys.executable, '-m', 'uvicorn', 'collectionapp.asgi:application',
+                '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers), '--no-access-log'], True
+    if importlib.util.find_spec('gunicorn') is not None:
+        return [sys.executable, '-m', 'gunicorn', 'collectionapp.wsgi:application',
+                '--bind', bind, '--workers', str(workers), '--threads', '8'], True
+    # Fall back to Django's threaded development server, which serves WSGI_APPLICATION
+    return [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'runserver', bind, '--noreload'], False
+
+
+class LocalServer:
+    """Boot the project in a subprocess for the duration of a ``with`` block"""
+
+    def __init__(self, interface='wsgi', workers=1, startup_timeout=30):
+        self.port = _free_port()
+        self.command, self.keep_alive = server_command(interface, self.port, workers)
+        self.url = f'http://127.0.0.1:{self.port}'
+        self.startup_timeout = startup_timeout
+        self.process = None
+
+    def __enter__(self):
+        env = {**os.environ, 'PYTHONPATH': os.pathsep.join(
+            filter(None, [str(settings.BASE_DIR), os.environ.get('PYTHONPATH')])
+        )}
+        # A file rather than a pipe, so request logging can never block the server
+        self.log = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(self.command, cwd=settings.BASE_DIR, env=env,
+                                        stdout=subprocess.DEVNULL, stderr=self.log)
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                self.log.seek(0)
+                raise RuntimeError(f'Server exited on startup:\n{self.log.read().decode()[-2000:]}')
+            try:
+                with socket.create_connection(('127.0.0.1', self.port), timeout=1):
+                    return self
+            except OSError:
+                time.sleep(0.2)
+        self.__exit__(None, None, None)
+        raise RuntimeError(f'Server did not start within {self.startup_timeout}s')
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.log.close()
@@ -0,0 +1,72 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from hmmrspce.fast_serializers import FastItemSerializer
+from hmmrspce.models import Collection, Item
+from hmmrspce.renderers import FastJSONRenderer, orjson
+from hmmrspce.serializers import ItemSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare item list serialization throughput of ItemSerializer and the fast read path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=5000, help='Items to serialize per run')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per serializer; the best is reported')
+
+    def handle(self, *args, **options):
+        # Seed throwaway data and roll it back afterwards
+        with transaction.atomic():
+            user = User.objects.create_user('benchmark_serializers_user')
+            collection = Collection.objects.create(name='Benchmark', created_by=user)
+            Item.objects.bulk_create(
+                Item(
+                    name=f'Item {i}',
+                    description='Benchmark item ' * 5,
+                    collection=collection,
+                    created_by=user,
+                    custom_fields={
+                        'author': f'Author {i % 50}',
+                        'pages': 100 + i % 400,
+                        'tags': ['fiction', 'signed', 'first-edition'],
+                        'details': {'format': 'hardcover', 'rating': i % 5},
+                    },
+                )
+                for i in range(options['items'])
+            )
+
+            request = Request(APIRequestFactory().get('/api/items/'))
+            request.user = user
+            context = {'request': request}
+            queryset = Item.objects.filter(collection=collection)
+
+            def current():
+                data = ItemSerializer(queryset, many=True, context=context).data
+                return JSONRenderer().render(data)
+
+            def fast():
+                data = FastItemSerializer(FastItemSerializer.rows(queryset), context=context).data
+                return FastJSONRenderer().render(data)
+
+            self.stdout.write(f"{options['items']} items, best of {options['repeat']} runs "
+                              f"(orjson {'enabled' if orjson else 'not installed'})")
+            baseline = self.measure('ItemSerializer + JSONRenderer', current, options)
+            optimized = self.measure('FastItemSerializer + FastJSONRenderer', fast, options)
+            self.stdout.write(self.style.SUCCESS(f'Speedup: {baseline / optimized:.1f}x'))
+
+            transaction.set_rollback(True)
+
+    def measure(self, label, func, options):
+        timings = []
+        for _ in range(options['repeat']):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        self.stdout.write(f"{label:<40} {best * 1000:8.1f} ms  {options['items'] / best:10.0f} items/s")
+        return best
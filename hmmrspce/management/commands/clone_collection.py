@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from hmmrspce.models import Collection
+from hmmrspce.cloning import clone_collection
+
+
+class Command(BaseCommand):
+    help = 'Copy a collection and all of its items to a user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('collection_id', type=int)
+        parser.add_argument('username')
+        parser.add_argument('--name', help='Name for the new collection')
+
+    def handle(self, *args, **options):
+        try:
+            source = Collection.objects.get(pk=options['collection_id'])
+        except Collection.DoesNotExist:
+            raise CommandError(f"Collection {options['collection_id']} does not exist")
+
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']} does not exist")
+
+        clone = clone_collection(source, user, name=options['name'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Cloned '{source.name}' to '{clone.name}' ({clone.items.count()} items)")
+        )
@@ -1,11 +1,128 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
-from hmmrspce.models import Collection, Item
+from django.db import transaction
+from hmmrspce.models import Collection, CollectionTemplate, Item
+
+
+TEMPLATES = [
+    {
+        'name': 'Book Collection',
+        'slug': 'books',
+        'description': 'Template for organizing your book collection',
+        'fields': [
+            {'name': 'author', 'type': 'string', 'required': True},
+            {'name': 'isbn', 'type': 'string'},
+            {'name': 'pages', 'type': 'integer'},
+            {'name': 'genre', 'type': 'string'},
+            {'name': 'publication_year', 'type': 'integer'},
+            {'name': 'rating', 'type': 'integer'},
+            {'name': 'read_status', 'type': 'string'},
+            {'name': 'purchase_date', 'type': 'date'},
+            {'name': 'format', 'type': 'string'},
+            {'name': 'publisher', 'type': 'string'},
+            {'name': 'language', 'type': 'string'},
+        ],
+        'example': {
+            'name': 'Example Book',
+            'description': 'This is an example of how to catalog your books',
+            'custom_fields': {
+                'author': 'Author Name',
+                'isbn': '978-0000000000',
+                'pages': 300,
+                'genre': 'Fiction',
+                'publication_year': 2023,
+                'rating': 5,
+                'read_status': 'completed',
+                'purchase_date': '2024-01-01',
+                'format': 'hardcover',
+                'publisher': 'Publisher Name',
+                'language': 'English'
+            }
+        }
+    },
+    {
+        'name': 'Comic Collection',
+        'slug': 'comics',
+        'description': 'Template for organizing your comic collection',
+        'fields': [
+            {'name': 'series', 'type': 'string', 'required': True},
+            {'name': 'issue_number', 'type': 'integer'},
+            {'name': 'publisher', 'type': 'string'},
+            {'name': 'publication_date', 'type': 'date'},
+            {'name': 'writer', 'type': 'string'},
+            {'name': 'artist', 'type': 'string'},
+            {'name': 'cover_artist', 'type': 'string'},
+            {'name': 'condition', 'type': 'string'},
+            {'name': 'variant', 'type': 'boolean'},
+            {'name': 'purchase_price', 'type': 'number'},
+            {'name': 'current_value', 'type': 'number'},
+            {'name': 'graded', 'type': 'boolean'},
+            {'name': 'bag_and_board', 'type': 'boolean'},
+        ],
+        'example': {
+            'name': 'Example Comic #1',
+            'description': 'This is an example of how to catalog your comics',
+            'custom_fields': {
+                'series': 'Comic Series Name',
+                'issue_number': 1,
+                'publisher': 'Marvel',
+                'publication_date': '2024-01-01',
+                'writer': 'Writer Name',
+                'artist': 'Artist Name',
+                'cover_artist': 'Cover Artist Name',
+                'condition': 'Near Mint',
+                'variant': False,
+                'purchase_price': 4.99,
+                'current_value': 5.50,
+                'graded': False,
+                'bag_and_board': True
+            }
+        }
+    },
+    {
+        'name': 'Keyboard Collection',
+        'slug': 'keyboards',
+        'description': 'Template for organizing your mechanical keyboard collection',
+        'fields': [
+            {'name': 'brand', 'type': 'string', 'required': True},
+            {'name': 'model', 'type': 'string'},
+            {'name': 'layout', 'type': 'string'},
+            {'name': 'switches', 'type': 'string'},
+            {'name': 'keycaps', 'type': 'string'},
+            {'name': 'connection', 'type': 'string'},
+            {'name': 'hot_swappable', 'type': 'boolean'},
+            {'name': 'rgb', 'type': 'boolean'},
+            {'name': 'purchase_date', 'type': 'date'},
+            {'name': 'purchase_price', 'type': 'number'},
+            {'name': 'condition', 'type': 'string'},
+            {'name': 'modifications', 'type': 'list'},
+        ],
+        'example': {
+            'name': 'Example Mechanical Keyboard',
+            'description': 'This is an example of how to catalog your keyboards',
+            'custom_fields': {
+                'brand': 'Keychron',
+                'model': 'K8',
+                'layout': '75%',
+                'switches': 'Gateron Brown',
+                'keycaps': 'PBT Double Shot',
+                'connection': 'Wireless/USB-C',
+                'hot_swappable': True,
+                'rgb': True,
+                'purchase_date': '2024-01-01',
+                'purchase_price': 89.99,
+                'condition': 'Excellent',
+                'modifications': []
+            }
+        }
+    },
+]
 
 
 class Command(BaseCommand):
     help = 'Create template collections for common collection types'
 
+    @transaction.atomic
     def handle(self, *args, **options):
         # Create a template user if it doesn't exist
         template_user, created = User.objects.get_or_create(
@@ -18,108 +135,39 @@ class Command(BaseCommand):
             }
         )
 
-        # Book Collection Template
-        book_collection, created = Collection.objects.get_or_create(
-            name='Book Collection Template',
-            created_by=template_user,
-            defaults={
-                'description': 'Template for organizing your book collection',
-                'visibility': 'public'
-            }
-        )
-
-        if created:
-            # Sample book item
-            Item.objects.create(
-                name='Example Book',
-                description='This is an example of how to catalog your books',
-                collection=book_collection,
-                created_by=template_user,
-                visibility='public',
-                custom_fields={
-                    'author': 'Author Name',
-                    'isbn': '978-0000000000',
-                    'pages': 300,
-                    'genre': 'Fiction',
-                    'publication_year': 2023,
-                    'rating': 5,
-                    'read_status': 'completed',
-                    'purchase_date': '2024-01-01',
-                    'format': 'hardcover',
-                    'publisher': 'Publisher Name',
-                    'language': 'English'
+        for definition in TEMPLATES:
+            template, created = CollectionTemplate.objects.update_or_create(
+                slug=definition['slug'],
+                defaults={
+                    'name': definition['name'],
+                    'description': definition['description'],
+                    'fields': definition['fields'],
                 }
             )
 
-        # Comic Collection Template
-        comic_collection, created = Collection.objects.get_or_create(
-            name='Comic Collection Template',
-            created_by=template_user,
-            defaults={
-                'description': 'Template for organizing your comic collection',
-                'visibility': 'public'
-            }
-        )
-
-        if created:
-            # Sample comic item
-            Item.objects.create(
-                name='Example Comic #1',
-                description='This is an example of how to catalog your comics',
-                collection=comic_collection,
+            # Public example collection showing the template in use
+            collection, created = Collection.objects.get_or_create(
+                name=f"{definition['name']} Template",
                 created_by=template_user,
-                visibility='public',
-                custom_fields={
-                    'series': 'Comic Series Name',
-                    'issue_number': 1,
-                    'publisher': 'Marvel',
-                    'publication_date': '2024-01-01',
-                    'writer': 'Writer Name',
-                    'artist': 'Artist Name',
-                    'cover_artist': 'Cover Artist Name',
-                    'condition': 'Near Mint',
-                    'variant': False,
-                    'purchase_price': 4.99,
-                    'current_value': 5.50,
-                    'graded': False,
-                    'bag_and_board': True
+                defaults={
+                    'description': definition['description'],
+                    'visibility': 'public',
+                    'template': template,
                 }
             )
 
-        # Keyboard Collection Template
-        keyboard_collection, created = Collection.objects.get_or_create(
-            name='Keyboard Collection Template',
-            created_by=template_user,
-            defaults={
-                'description': 'Template for organizing your mechanical keyboard collection',
-                'visibility': 'public'
-            }
-        )
+            if collection.template_id != template.id:
+                collection.template = template
+                collection.save(update_fields=['template'])
 
-        if created:
-            # Sample keyboard item
-            Item.objects.create(
-                name='Example Mechanical Keyboard',
-                description='This is an example of how to catalog your keyboards',
-                collection=keyboard_collection,
-                created_by=template_user,
-                visibility='public',
-                custom_fields={
-                    'brand': 'Keychron',
-                    'model': 'K8',
-                    'layout': '75%',
-                    'switches': 'Gateron Brown',
-                    'keycaps': 'PBT Double Shot',
-                    'connection': 'Wireless/USB-C',
-                    'hot_swappable': True,
-                    'rgb': True,
-                    'purchase_date': '2024-01-01',
-                    'purchase_price': 89.99,
-                    'condition': 'Excellent',
-                    'modifications': []
-                }
-            )
+            if created:
+                Item.objects.create(
+                    collection=collection,
+                    created_by=template_user,
+                    visibility='public',
+                    **definition['example']
+                )
 
         self.stdout.write(
             self.style.SUCCESS('Successfully created collection templates')
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from hmmrspce.backup import iter_archive
+
+
+class Command(BaseCommand):
+    help = "Export a user's collections, items, shares and images to a backup archive"
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('output', help='Path of the .zip archive to write')
+        parser.add_argument('--collection', type=int, action='append', dest='collections',
+                            help='Only export this collection (repeatable)')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']} does not exist")
+
+        with open(options['output'], 'wb') as output:
+            for chunk in iter_archive(user, collection_ids=options['collections']):
+                output.write(chunk)
+
+        self.stdout.write(self.style.SUCCESS(f"Exported {user.username} to {options['output']}"))
@@ -0,0 +1,71 @@
+import json
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+from hmmrspce import loadtest
+
+
+class Command(BaseCommand):
+    help = 'Seed load-test data, boot a local server and report throughput and latency per scenario'
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenarios', nargs='*',
+                            help=f"Scenarios to run (default: all of {', '.join(loadtest.SCENARIOS)})")
+        parser.add_argument('--interface', choices=['wsgi', 'asgi'], default='wsgi',
+                            help='Entry point to serve: gunicorn/runserver for WSGI, uvicorn for ASGI')
+        parser.add_argument('--url', help='Target an already running server instead of booting one')
+        parser.add_argument('--workers', type=int, default=1, help='Server worker processes')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent simulated users')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per scenario')
+        parser.add_argument('--users', type=int, default=10, help='Seeded users with their own collections')
+        parser.add_argument('--items', type=int, default=200, help='Seeded items per collection')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for repeatable runs')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+        parser.add_argument('--cleanup', action='store_true', help='Delete the load-test accounts and exit')
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            deleted = loadtest.cleanup()
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} load-test accounts'))
+            return
+
+        scenarios = options['scenarios'] or list(loadtest.SCENARIOS)
+        unknown = set(scenarios) - set(loadtest.SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+
+        context = loadtest.seed(users=options['users'], items_per_collection=options['items'])
+
+        try:
+            server = nullcontext() if options['url'] else loadtest.LocalServer(
+                options['interface'], workers=options['workers'])
+            with server:
+                url = options['url'] or server.url
+                results = {}
+                for scenario in scenarios:
+                    if not options['json']:
+                        self.stdout.write(f"Running {scenario} against {url} "
+                                          f"({options['concurrency']} users, {options['duration']:g}s)...")
+                    results[scenario] = loadtest.run_scenario(
+                        scenario, url, context, concurrency=options['concurrency'],
+                        duration=options['duration'], seed_value=options['seed'],
+                        keep_alive=getattr(server, 'keep_alive', True),
+                    )
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        header = f"{'request':<36} {'reqs':>7} {'err':>5} {'req/s':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}"
+        for scenario, result in results.items():
+            self.stdout.write('')
+            self.stdout.write(self.style.MIGRATE_HEADING(scenario))
+            self.stdout.write(header)
+            for label, stats in [*result['requests'].items(), ('total', result['total'])]:
+                self.stdout.write(
+                    f"{label:<36} {stats['requests']:>7} {stats['errors']:>5} {stats['rps']:>8.1f} "
+                    f"{stats['p50_ms']:>6.1f}ms {stats['p90_ms']:>6.1f}ms "
+                    f"{stats['p99_ms']:>6.1f}ms {stats['max_ms']:>6.1f}ms"
+                )
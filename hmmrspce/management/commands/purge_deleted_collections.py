@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from hmmrspce.models import Collection
+from hmmrspce.purge import purge_collection, DEFAULT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Permanently remove soft-deleted collections, their items, shares and image files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Rows deleted per transaction')
+        parser.add_argument('--grace-minutes', type=int, default=0,
+                            help='Only purge collections deleted at least this long ago')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(minutes=options['grace_minutes'])
+        pending = Collection.all_objects.filter(deleted_at__lte=cutoff).values_list('pk', flat=True)
+
+        for collection in Collection.all_objects.filter(pk__in=list(pending)).only('pk', 'name'):
+            result = purge_collection(collection, batch_size=options['batch_size'])
+            self.stdout.write(
+                f"Purged '{collection.name}': {result['items']} items, {result['files']} files"
+            )
+
+        self.stdout.write(self.style.SUCCESS('Finished purging deleted collections'))
@@ -0,0 +1,24 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from hmmrspce.purge import purge_user, DEFAULT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Permanently remove a user with their collections, items, shares and image files, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Rows deleted per transaction')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']} does not exist")
+
+        result = purge_user(user, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Purged {options['username']}: {result['collections']} collections, "
+            f"{result['items']} items, {result['files']} files"
+        ))
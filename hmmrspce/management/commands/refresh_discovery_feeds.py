@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from hmmrspce.discovery import refresh_rankings, DEFAULT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Recompute the rankings behind the public discovery feeds (run periodically, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Collections aggregated per query')
+
+    def handle(self, *args, **options):
+        ranked = refresh_rankings(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Ranked {ranked} public collections'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from hmmrspce.backup import restore_archive, BackupError
+
+
+class Command(BaseCommand):
+    help = "Restore a backup archive into a user's account"
+
+    def add_arguments(self, parser):
+        parser.add_argument('archive', help='Path of the .zip archive to restore')
+        parser.add_argument('username')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']} does not exist")
+
+        try:
+            with open(options['archive'], 'rb') as archive:
+                counts = restore_archive(archive, user)
+        except BackupError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            'Restored {collections} collections, {items} items, {shares} shares '
+            'and {images} images'.format(**counts)
+        ))
@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Runs in a fresh interpreter so the measurement covers a real worker boot:
+# settings, app registry, URLconf and the WSGI handler.
+BOOT_SCRIPT = """
+import resource
+import django
+django.setup()
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+get_wsgi_application()
+get_resolver().url_patterns
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def parse_importtime(output):
+    """Parse ``python -X importtime`` output into (module, self_us, cumulative_us) rows"""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        rows.append((parts[2].strip(), int(parts[0]), int(parts[1])))
+    return rows
+
+
+class Command(BaseCommand):
+    help = 'Measure worker boot time, peak memory and the slowest module imports for a settings profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', default=os.environ.get('DJANGO_SETTINGS_MODULE'),
+                            help='Settings module to boot, e.g. collectionapp.settings_api')
+        parser.add_argument('--top', type=int, default=25, help='Number of modules to list')
+        parser.add_argument('--sort', choices=['self', 'cumulative'], default='cumulative')
+
+    def handle(self, *args, **options):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': options['profile']}
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(settings.BASE_DIR), env.get('PYTHONPATH')]))
+
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT],
+            env=env, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Booting {options['profile']} failed:\n{result.stderr[-2000:]}")
+
+        rows = parse_importtime(result.stderr)
+        total_us = sum(self_us for _, self_us, _ in rows)
+        max_rss_kb = int(result.stdout.strip().splitlines()[-1])
+        index = 1 if options['sort'] == 'self' else 2
+
+        self.stdout.write(f"Profile: {options['profile']}")
+        self.stdout.write(f"Modules imported: {len(rows)}")
+        self.stdout.write(f"Total import time: {total_us / 1000:.1f} ms")
+        self.stdout.write(f"Peak RSS: {max_rss_kb / 1024:.1f} MB")
+        self.stdout.write('')
+        self.stdout.write(f"{'self ms':>10} {'cumul ms':>10}  module")
+        for module, self_us, cumulative_us in sorted(rows, key=lambda row: row[index], reverse=True)[:options['top']]:
+            self.stdout.write(f"{self_us / 1000:>10.1f} {cumulative_us / 1000:>10.1f}  {module}")
@@ -0,0 +1,25 @@
+from . import activity
+
+
+class ActivityLogMiddleware:
+    """
+    Collects activity events recorded while handling a request and writes
+    them with one bulk insert after the response is produced.
+
+    The actor is read from ``request.user`` at that point, which DRF has
+    already set for token-authenticated requests.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = activity.start_buffer()
+        try:
+            response = self.get_response(request)
+        except Exception:
+            activity.discard(token)
+            raise
+        user = getattr(request, 'user', None)
+        activity.flush(token, actor=user if user is not None and user.is_authenticated else None)
+        return response
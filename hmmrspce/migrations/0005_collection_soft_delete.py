@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hmmrspce', '0004_sharegroup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='collection',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='collection',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='collection',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('name', 'created_by'), name='unique_active_collection_name'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:34
+
+from django.db import migrations, models
+
+from hmmrspce import fingerprints
+
+
+def backfill_fingerprints(apps, schema_editor):
+    Item = apps.get_model('hmmrspce', 'Item')
+    batch = []
+    columns = None
+    for item in Item.objects.only('id', 'name', 'description', 'custom_fields').iterator(chunk_size=1000):
+        values = fingerprints.compute(item.name, item.description, item.custom_fields)
+        columns = list(values)
+        for field, value in values.items():
+            setattr(item, field, value)
+        batch.append(item)
+        if len(batch) >= 1000:
+            Item.objects.bulk_update(batch, columns)
+            batch = []
+    if batch:
+        Item.objects.bulk_update(batch, columns)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hmmrspce', '0006_activityevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='fingerprint_isbn',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=13),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='fingerprint_name',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='simhash',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='simhash_band0',
+            field=models.IntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='simhash_band1',
+            field=models.IntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='simhash_band2',
+            field=models.IntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='simhash_band3',
+            field=models.IntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+    ]
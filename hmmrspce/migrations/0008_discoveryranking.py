@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hmmrspce', '0007_item_fingerprints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiscoveryRanking',
+            fields=[
+                ('collection', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='discovery_ranking', serialize=False, to='hmmrspce.collection')),
+                ('public_items_count', models.PositiveIntegerField(default=0)),
+                ('last_activity_at', models.DateTimeField()),
+                ('refreshed_at', models.DateTimeField()),
+                ('template', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='hmmrspce.collectiontemplate')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-last_activity_at', '-collection'], name='discovery_recent'), models.Index(fields=['-public_items_count', '-collection'], name='discovery_popular'), models.Index(fields=['template', '-last_activity_at', '-collection'], name='discovery_template_recent'), models.Index(fields=['template', '-public_items_count', '-collection'], name='discovery_template_popular')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hmmrspce', '0008_discoveryranking'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='collection',
+            name='name',
+            field=models.CharField(db_index=True, max_length=200),
+        ),
+    ]
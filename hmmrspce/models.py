@@ -1,6 +1,9 @@
 from django.db import models
+from django.db.models import Exists, OuterRef, Q
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+from . import fingerprints
 
 
 class CollectionShare(models.Model):
@@ -23,6 +26,76 @@ class CollectionShare(models.Model):
         return f"{self.collection.name} shared with {self.shared_with.username} ({self.permission_level})"
 
 
+class ShareGroup(models.Model):
+    name = models.CharField(max_length=200)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='share_groups')
+    members = models.ManyToManyField(User, related_name='member_of_share_groups', blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['name']
+        unique_together = ['name', 'owner']
+
+    def __str__(self):
+        return f"{self.name} by {self.owner.username}"
+
+
+class CollectionGroupShare(models.Model):
+    collection = models.ForeignKey('Collection', on_delete=models.CASCADE, related_name='group_shares')
+    group = models.ForeignKey(ShareGroup, on_delete=models.CASCADE, related_name='collection_shares')
+    permission_level = models.CharField(max_length=10, choices=CollectionShare.PERMISSION_CHOICES, default='view')
+    created_at = models.DateTimeField(auto_now_add=True)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='group_shares_created')
+
+    class Meta:
+        unique_together = ['collection', 'group']
+
+    def __str__(self):
+        return f"{self.collection.name} shared with group {self.group.name} ({self.permission_level})"
+
+
+PERMISSION_RANK = {'view': 1, 'edit': 2, 'manage': 3}
+
+
+class CollectionTemplate(models.Model):
+    FIELD_TYPES = [
+        ('string', 'Text'),
+        ('integer', 'Whole Number'),
+        ('number', 'Number'),
+        ('boolean', 'Yes/No'),
+        ('date', 'Date'),
+        ('list', 'List'),
+    ]
+
+    name = models.CharField(max_length=200, unique=True)
+    slug = models.SlugField(max_length=50, unique=True)
+    description = models.TextField(blank=True)
+    fields = models.JSONField(default=list, blank=True)  # [{"name": ..., "type": ..., "required": bool}]
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    def clean(self):
+        valid_types = {choice for choice, _ in self.FIELD_TYPES}
+        for field in self.fields:
+            if not isinstance(field, dict) or not field.get('name'):
+                raise ValidationError('Each template field needs a name')
+            if field.get('type') not in valid_types:
+                raise ValidationError(f"Unknown type for field '{field['name']}'")
+
+
+class ActiveCollectionManager(models.Manager):
+    """Hides soft-deleted collections that are waiting to be purged"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Collection(models.Model):
     VISIBILITY_CHOICES = [
         ('private', 'Private'),
@@ -30,20 +103,36 @@ class Collection(models.Model):
         ('unlisted', 'Unlisted (viewable with link)'),
     ]
     
-    name = models.CharField(max_length=200)
+    name = models.CharField(max_length=200, db_index=True)
     description = models.TextField(blank=True)
     visibility = models.CharField(max_length=10, choices=VISIBILITY_CHOICES, default='private')
     is_public = models.BooleanField(default=False)  # Keep for backward compatibility
+    template = models.ForeignKey(CollectionTemplate, on_delete=models.SET_NULL, null=True, blank=True,
+                                 related_name='collections')
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='collections')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    objects = ActiveCollectionManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ['-created_at']
-        unique_together = ['name', 'created_by']
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'created_by'], condition=Q(deleted_at__isnull=True),
+                                    name='unique_active_collection_name'),
+        ]
 
     def __str__(self):
         return f"{self.name} by {self.created_by.username}"
+
+    def soft_delete(self):
+        """Hide the collection immediately; purge_deleted_collections removes its data later"""
+        self.deleted_at = timezone.now()
+        Collection.all_objects.filter(pk=self.pk).update(deleted_at=self.deleted_at)
+        from .discovery import withdraw
+        withdraw(self.pk)
     
     def save(self, *args, **kwargs):
         # Sync is_public with visibility for backward compatibility
@@ -58,16 +147,39 @@ class Collection(models.Model):
             return True
         if self.visibility == 'unlisted':
             return True
-        return self.shares.filter(shared_with=user).exists()
+        return self.get_shared_permission(user) is not None
     
     def get_user_permission(self, user):
         """Get user's permission level for this collection"""
         if self.created_by == user:
             return 'owner'
+        shared = self.get_shared_permission(user)
+        if shared is not None:
+            return shared
         if self.visibility == 'public':
             return 'view'
-        share = self.shares.filter(shared_with=user).first()
-        return share.permission_level if share else None
+        return None
+
+    def get_shared_permission(self, user):
+        """Highest permission granted to user directly or through a share group, in one query"""
+        if not user.is_authenticated:
+            return None
+        direct = self.shares.filter(shared_with=user).values_list('permission_level', flat=True)
+        grouped = self.group_shares.filter(group__members=user).values_list('permission_level', flat=True)
+        levels = set(direct.union(grouped))
+        return max(levels, key=PERMISSION_RANK.get) if levels else None
+
+    @classmethod
+    def shared_with_q(cls, user):
+        """
+        Q object matching collections shared with user directly or through a group.
+
+        Correlated EXISTS subqueries rather than joins, so rows don't multiply
+        by share and group member counts and callers don't need distinct().
+        """
+        direct = CollectionShare.objects.filter(collection=OuterRef('pk'), shared_with=user)
+        grouped = CollectionGroupShare.objects.filter(collection=OuterRef('pk'), group__members=user)
+        return Q(Exists(direct)) | Q(Exists(grouped))
 
 
 class Item(models.Model):
@@ -88,6 +200,15 @@ class Item(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Duplicate detection fingerprints, maintained on save (see fingerprints.py)
+    fingerprint_isbn = models.CharField(max_length=13, blank=True, db_index=True, editable=False)
+    fingerprint_name = models.CharField(max_length=200, blank=True, db_index=True, editable=False)
+    simhash = models.BigIntegerField(default=0, editable=False)
+    simhash_band0 = models.IntegerField(default=0, db_index=True, editable=False)
+    simhash_band1 = models.IntegerField(default=0, db_index=True, editable=False)
+    simhash_band2 = models.IntegerField(default=0, db_index=True, editable=False)
+    simhash_band3 = models.IntegerField(default=0, db_index=True, editable=False)
+
     class Meta:
         ordering = ['-created_at']
 
@@ -95,6 +216,11 @@ class Item(models.Model):
         return f"{self.name} in {self.collection.name}"
     
     def save(self, *args, **kwargs):
+        self.sync_derived_fields()
+        super().save(*args, **kwargs)
+
+    def sync_derived_fields(self):
+        """Update fields derived from others; also call this before bulk_create"""
         # Sync is_public with visibility for backward compatibility
         if self.visibility == 'public':
             self.is_public = True
@@ -102,7 +228,9 @@ class Item(models.Model):
             self.is_public = self.collection.is_public
         else:
             self.is_public = False
-        super().save(*args, **kwargs)
+        # Duplicate detection fingerprints
+        for field, value in fingerprints.compute(self.name, self.description, self.custom_fields).items():
+            setattr(self, field, value)
     
     def can_user_access(self, user):
         """Check if user can access this item"""
@@ -124,3 +252,69 @@ class Item(models.Model):
             return self.collection.get_user_permission(user)
         return None
 
+
+
+class ActivityEvent(models.Model):
+    """
+    Append-only record of changes to a collection.
+
+    Rows are only ever inserted (in bulk, after commit) and read newest-first
+    per collection, so there are no foreign key constraints to check on
+    insert and the (collection, id) index serves the feed at any size.
+    """
+    VERB_CHOICES = [
+        ('created', 'Created'),
+        ('updated', 'Updated'),
+        ('deleted', 'Deleted'),
+    ]
+    TARGET_CHOICES = [
+        ('item', 'Item'),
+        ('share', 'Share'),
+        ('group_share', 'Group Share'),
+    ]
+
+    collection = models.ForeignKey(Collection, on_delete=models.DO_NOTHING, db_constraint=False,
+                                   related_name='activity')
+    actor = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, null=True,
+                              related_name='+')
+    verb = models.CharField(max_length=10, choices=VERB_CHOICES)
+    target_type = models.CharField(max_length=20, choices=TARGET_CHOICES)
+    target_id = models.BigIntegerField()
+    data = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['collection', '-id'], name='activity_collection_feed'),
+        ]
+
+    def __str__(self):
+        return f"{self.target_type} {self.target_id} {self.verb} in collection {self.collection_id}"
+
+
+class DiscoveryRanking(models.Model):
+    """
+    Precomputed ranking keys for the public discovery feeds.
+
+    Rebuilt periodically by refresh_discovery_feeds; each feed is an index
+    scan over one of the composite indexes below.
+    """
+    collection = models.OneToOneField(Collection, on_delete=models.CASCADE, primary_key=True,
+                                      related_name='discovery_ranking')
+    template = models.ForeignKey(CollectionTemplate, on_delete=models.SET_NULL, null=True, blank=True,
+                                 related_name='+')
+    public_items_count = models.PositiveIntegerField(default=0)
+    last_activity_at = models.DateTimeField()
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-last_activity_at', '-collection'], name='discovery_recent'),
+            models.Index(fields=['-public_items_count', '-collection'], name='discovery_popular'),
+            models.Index(fields=['template', '-last_activity_at', '-collection'], name='discovery_template_recent'),
+            models.Index(fields=['template', '-public_items_count', '-collection'],
+                         name='discovery_template_popular'),
+        ]
+
+    def __str__(self):
+        return f"Ranking for collection {self.collection_id}"
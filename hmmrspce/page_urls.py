@@ -0,0 +1,9 @@
+from django.urls import path
+from . import template_views
+
+urlpatterns = [
+    path('', template_views.home, name='home'),
+    path('collections/', template_views.collections, name='collections'),
+    path('collections/<int:collection_id>/items/', template_views.collection_items, name='collection_items'),
+    path('public/', template_views.public_collections, name='public_collections'),
+]
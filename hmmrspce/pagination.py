@@ -0,0 +1,9 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ActivityCursorPagination(CursorPagination):
+    """Keyset pagination on id, so deep pages cost the same as the first"""
+    ordering = '-id'
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = 'page_size'
@@ -34,6 +34,18 @@ class IsOwnerOrSharedAccess(permissions.BasePermission):
         return False
 
 
+class CanViewCollection(permissions.BasePermission):
+    """
+    Any level of access to the collection, for any request method.
+
+    For actions that only read a collection but aren't GETs, such as
+    issuing a realtime ticket.
+    """
+
+    def has_object_permission(self, request, view, obj):
+        return obj.get_user_permission(request.user) is not None
+
+
 class CanViewPublicContent(permissions.BasePermission):
     """
     Permission for public content viewing.
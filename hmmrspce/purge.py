@@ -0,0 +1,101 @@
+from django.core.files.storage import default_storage
+from django.db import transaction
+from .models import Collection, CollectionShare, CollectionGroupShare, Item, ActivityEvent, ShareGroup
+from .stats import invalidate_collection_stats
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _delete_in_batches(queryset, batch_size):
+    """
+    Delete rows of queryset in primary key batches, each in its own transaction.
+
+    ``_raw_delete`` issues a plain DELETE without loading instances or firing
+    signals, so memory and lock time stay bounded by the batch size.
+    """
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            batch = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not batch:
+                return deleted
+            batch_qs = queryset.model.objects.filter(pk__in=batch)
+            deleted += batch_qs._raw_delete(batch_qs.db)
+
+
+def _delete_item_batches(items, batch_size):
+    """Delete items in batches, returning the image names they referenced"""
+    images = set()
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            batch = list(items.order_by('pk').values_list('pk', 'image')[:batch_size])
+            if not batch:
+                return deleted, images
+            images.update(image for _, image in batch if image)
+            batch_qs = Item.objects.filter(pk__in=[pk for pk, _ in batch])
+            deleted += batch_qs._raw_delete(batch_qs.db)
+
+
+def cleanup_orphaned_images(names):
+    """Remove stored image files that no remaining item references"""
+    names = set(names)
+    still_used = set(Item.objects.filter(image__in=names).values_list('image', flat=True))
+    removed = 0
+    for name in names - still_used:
+        if default_storage.exists(name):
+            default_storage.delete(name)
+            removed += 1
+    return removed
+
+
+def purge_collection(collection, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Permanently remove a soft-deleted collection and everything under it.
+
+    Children are deleted first in bounded batches, then the collection row.
+    Image files are only deleted once no item (e.g. a clone) refers to them.
+    """
+    items, images = _delete_item_batches(Item.objects.filter(collection_id=collection.pk), batch_size)
+    _delete_in_batches(CollectionShare.objects.filter(collection_id=collection.pk), batch_size)
+    _delete_in_batches(CollectionGroupShare.objects.filter(collection_id=collection.pk), batch_size)
+    _delete_in_batches(ActivityEvent.objects.filter(collection_id=collection.pk), batch_size)
+    Collection.all_objects.filter(pk=collection.pk).delete()
+    files = cleanup_orphaned_images(images)
+    return {'items': items, 'files': files}
+
+
+def purge_user(user, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Permanently remove a user and everything they own, in bounded batches.
+
+    ``user.delete()`` alone makes Django's collector load every collection,
+    item, share and group of the user into memory and fire per-item signals;
+    here those rows are removed first so the final delete has little left
+    to cascade to.
+    """
+    collections = items = files = 0
+    for collection in Collection.all_objects.filter(created_by=user).only('pk'):
+        result = purge_collection(collection, batch_size)
+        items += result['items']
+        files += result['files']
+        collections += 1
+
+    # Items the user added to other people's collections
+    affected = set(Item.objects.filter(created_by=user).values_list('collection_id', flat=True).distinct())
+    deleted, images = _delete_item_batches(Item.objects.filter(created_by=user), batch_size)
+    items += deleted
+    for collection_id in affected:
+        invalidate_collection_stats(collection_id)
+    files += cleanup_orphaned_images(images)
+
+    _delete_in_batches(CollectionShare.objects.filter(shared_with=user), batch_size)
+    _delete_in_batches(CollectionShare.objects.filter(created_by=user), batch_size)
+    _delete_in_batches(CollectionGroupShare.objects.filter(group__owner=user), batch_size)
+    _delete_in_batches(CollectionGroupShare.objects.filter(created_by=user), batch_size)
+    _delete_in_batches(ShareGroup.members.through.objects.filter(user=user), batch_size)
+    _delete_in_batches(ShareGroup.members.through.objects.filter(sharegroup__owner=user), batch_size)
+    _delete_in_batches(ShareGroup.objects.filter(owner=user), batch_size)
+    user.delete()
+    return {'collections': collections, 'items': items, 'files': files}
@@ -0,0 +1,150 @@
+"""
+Realtime change notifications for collections.
+
+Changes are published to a broker once their transaction commits, and
+server-sent event streams subscribe to one channel per collection. The
+default LocalBroker fans events out within the current process; set
+REALTIME_BROKER to the dotted path of another Broker subclass (e.g. one
+backed by Redis pub/sub) to reach subscribers on other workers.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+SUBSCRIBER_QUEUE_SIZE = 100
+KEEPALIVE_SECONDS = 15
+# EventSource can't send an Authorization header, so streams are opened with a
+# short-lived signed ticket instead of the API token itself
+TICKET_MAX_AGE = 60
+_ticket_signer = signing.TimestampSigner(salt='hmmrspce.realtime')
+
+
+def collection_channel(collection_id):
+    return f'collection:{collection_id}'
+
+
+class Subscription:
+    """One subscriber's queue of events, bound to the event loop that created it"""
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def push(self, event):
+        # Slow consumers lose their oldest events rather than growing without bound
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        """Wait for the next event; returns None if ``timeout`` seconds pass first"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """Interface for delivering published events to subscriptions"""
+
+    def publish(self, channel, event):
+        raise NotImplementedError
+
+    def subscribe(self, channel):
+        """Return a Subscription; must be called from a running event loop"""
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class LocalBroker(Broker):
+    """
+    In-process fan-out hub.
+
+    Subscribers are just asyncio queues, so idle connections cost no
+    threads. publish() may be called from any thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.push, event)
+            except RuntimeError:  # Loop already closed
+                self.unsubscribe(subscription)
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(getattr(settings, 'REALTIME_BROKER', 'hmmrspce.realtime.LocalBroker'))()
+    return _broker
+
+
+def set_broker(broker):
+    """Replace the process-wide broker, e.g. with a stub in tests"""
+    global _broker
+    _broker = broker
+
+
+def publish_on_commit(collection_id, event_type, **data):
+    """Publish a collection change event once the current transaction commits"""
+    event = {'type': event_type, 'collection': collection_id, **data}
+    transaction.on_commit(lambda: get_broker().publish(collection_channel(collection_id), event))
+
+
+def can_stream(request):
+    """
+    Whether event streams can be served to this request.
+
+    Under WSGI Django has to consume an async response body before sending
+    anything, and an event stream never ends, so streams need ASGI.
+    """
+    from django.core.handlers.asgi import ASGIRequest
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+def make_ticket(user, collection_id):
+    return _ticket_signer.sign(f'{user.pk}:{collection_id}')
+
+
+def check_ticket(ticket, collection_id):
+    """Return the user id a ticket was issued to, or None if it is invalid or expired"""
+    try:
+        user_id, ticket_collection = _ticket_signer.unsign(ticket, max_age=TICKET_MAX_AGE).split(':')
+    except (signing.BadSignature, ValueError):
+        return None
+    return int(user_id) if ticket_collection == str(collection_id) else None
@@ -0,0 +1,78 @@
+import json
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # Falls back to the stock json module
+    orjson = None
+
+
+LINE_SEPARATOR = '\u2028'.encode()
+PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+
+class RawJSON:
+    """JSON text to embed in a rendered response"""
+    __slots__ = ['text']
+
+    def __init__(self, text):
+        self.text = text
+
+
+def raw_json(text):
+    """
+    Wrap JSON text that came straight from the database for rendering.
+
+    With orjson the text is embedded in the output as-is; without it the
+    text has to be decoded so the stock encoder can re-encode it.
+    """
+    if text is None:
+        return None
+    if orjson is not None:
+        return RawJSON(text)
+    return json.loads(text)
+
+
+class RawJSONEncoder(JSONEncoder):
+    """Stock encoder that also decodes RawJSON, for the fallback paths"""
+
+    def default(self, obj):
+        if isinstance(obj, RawJSON):
+            return json.loads(obj.text)
+        return super().default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed.
+
+    Pretty-printed responses (``indent`` requested) and data orjson can't
+    encode, such as integers beyond 64 bits, go through the stock renderer.
+    """
+    encoder_class = RawJSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        encoder = self.encoder_class()
+
+        def default(obj):
+            if isinstance(obj, RawJSON):
+                return orjson.Fragment(obj.text)
+            return encoder.default(obj)
+
+        try:
+            ret = orjson.dumps(data, default=default, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:  # orjson.JSONEncodeError subclasses TypeError
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Keep the output a strict javascript subset, like JSONRenderer
+        if LINE_SEPARATOR in ret or PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(LINE_SEPARATOR, b'\u2028').replace(PARAGRAPH_SEPARATOR, b'\u2029')
+        return ret
@@ -0,0 +1,63 @@
+import datetime
+from functools import lru_cache
+
+
+def _is_integer(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_date(value):
+    if not isinstance(value, str):
+        return False
+    try:
+        datetime.date.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+TYPE_CHECKS = {
+    'string': lambda value: isinstance(value, str),
+    'integer': _is_integer,
+    'number': _is_number,
+    'boolean': lambda value: isinstance(value, bool),
+    'date': _is_date,
+    'list': lambda value: isinstance(value, list),
+}
+
+
+@lru_cache(maxsize=256)
+def _compile(fields):
+    checks = tuple((name, field_type, TYPE_CHECKS[field_type], required)
+                   for name, field_type, required in fields)
+
+    def validate(custom_fields):
+        errors = {}
+        for name, field_type, check, required in checks:
+            if name not in custom_fields or custom_fields[name] is None:
+                if required:
+                    errors[name] = 'This field is required.'
+                continue
+            if not check(custom_fields[name]):
+                errors[name] = f'Expected a value of type {field_type}.'
+        return errors
+
+    return validate
+
+
+def get_template_validator(template):
+    """
+    Return a compiled validator for a template's field schema.
+
+    Validators are cached on the (hashable) field definitions, so templates
+    sharing a schema share a validator and edits produce a fresh one.
+    """
+    fields = tuple(
+        (field['name'], field['type'], bool(field.get('required', False)))
+        for field in template.fields
+    )
+    return _compile(fields)
@@ -1,7 +1,13 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
-from .models import Collection, Item, CollectionShare
+from django.db import transaction
+from .models import (
+    Collection, CollectionTemplate, Item, CollectionShare, ShareGroup, CollectionGroupShare,
+    ActivityEvent
+)
+from .schemas import get_template_validator
+from . import activity
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -11,6 +17,13 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
+class CollectionTemplateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CollectionTemplate
+        fields = ['id', 'name', 'slug', 'description', 'fields', 'updated_at']
+        read_only_fields = fields
+
+
 class CollectionSerializer(serializers.ModelSerializer):
     created_by = UserSerializer(read_only=True)
     items_count = serializers.SerializerMethodField()
@@ -19,7 +32,7 @@ class CollectionSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Collection
-        fields = ['id', 'name', 'description', 'visibility', 'is_public', 'created_by', 
+        fields = ['id', 'name', 'description', 'visibility', 'is_public', 'template', 'created_by', 
                  'created_at', 'updated_at', 'items_count', 'user_permission', 'shared_with_count']
         read_only_fields = ['id', 'created_by', 'created_at', 'updated_at', 'is_public']
 
@@ -58,13 +71,60 @@ class ItemSerializer(serializers.ModelSerializer):
             return obj.get_user_permission(request.user)
         return None
 
+    def validate(self, data):
+        collection = (data.get('collection') or getattr(self.instance, 'collection', None)
+                      or self.context.get('collection'))
+        custom_fields = data.get('custom_fields', getattr(self.instance, 'custom_fields', {}))
+        # Stored values were validated when saved, so an update only revalidates
+        # them when it sends new ones or moves the item under another template
+        revalidate = (self.instance is None or 'custom_fields' in data
+                      or (collection is not None and collection.template_id != self.instance.collection.template_id))
+        if revalidate and collection is not None and collection.template_id:
+            if not isinstance(custom_fields, dict):
+                raise serializers.ValidationError({'custom_fields': 'Must be an object.'})
+            errors = get_template_validator(collection.template)(custom_fields)
+            if errors:
+                raise serializers.ValidationError({'custom_fields': errors})
+        return data
+
     def create(self, validated_data):
         validated_data['created_by'] = self.context['request'].user
         return super().create(validated_data)
 
 
+class BulkItemSerializer(ItemSerializer):
+    """Validates one item of a bulk import; the collection comes from the serializer context"""
+
+    class Meta(ItemSerializer.Meta):
+        fields = ['name', 'description', 'custom_fields', 'visibility']
+        read_only_fields = []
+
+
+class BulkItemCreateSerializer(serializers.Serializer):
+    collection = serializers.IntegerField()
+    items = serializers.ListField(child=serializers.DictField(), allow_empty=False, max_length=1000)
+    skip_duplicates = serializers.BooleanField(default=False)
+
+
+class CloneSerializer(serializers.Serializer):
+    name = serializers.CharField(required=False, max_length=200)
+
+    def validate_name(self, value):
+        # CharField would quietly turn numbers into strings
+        if not isinstance(self.initial_data.get('name'), str):
+            raise serializers.ValidationError('Not a valid string.')
+        return value
+
+
+class PublicUserSerializer(serializers.ModelSerializer):
+    """Owner details safe to show anonymous visitors (no email)"""
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name']
+
+
 class PublicCollectionSerializer(serializers.ModelSerializer):
-    created_by = UserSerializer(read_only=True)
+    created_by = PublicUserSerializer(read_only=True)
     items_count = serializers.SerializerMethodField()
 
     class Meta:
@@ -73,11 +133,14 @@ class PublicCollectionSerializer(serializers.ModelSerializer):
                  'created_at', 'items_count']
 
     def get_items_count(self, obj):
+        # Discovery feeds attach the precomputed count
+        if hasattr(obj, 'public_items_count'):
+            return obj.public_items_count
         return obj.items.filter(is_public=True).count()
 
 
 class PublicItemSerializer(serializers.ModelSerializer):
-    created_by = UserSerializer(read_only=True)
+    created_by = PublicUserSerializer(read_only=True)
     collection_name = serializers.CharField(source='collection.name', read_only=True)
 
     class Meta:
@@ -154,4 +217,134 @@ class CollectionShareSerializer(serializers.ModelSerializer):
         if shared_with_user == self.context['request'].user:
             raise serializers.ValidationError("Cannot share collection with yourself")
         
-        return super().create(validated_data)
\ No newline at end of file
+        return super().create(validated_data)
+
+
+def resolve_usernames(usernames):
+    """Map usernames to users with a single query, failing on unknown names"""
+    users = {user.username: user for user in User.objects.filter(username__in=set(usernames))}
+    missing = sorted(set(usernames) - users.keys())
+    if missing:
+        raise serializers.ValidationError(f"Users not found: {', '.join(missing)}")
+    return users
+
+
+class ShareGrantSerializer(serializers.Serializer):
+    username = serializers.CharField()
+    permission_level = serializers.ChoiceField(choices=CollectionShare.PERMISSION_CHOICES)
+
+
+class BulkShareSerializer(serializers.Serializer):
+    """Create, update and revoke many collection shares in one transaction"""
+    grants = ShareGrantSerializer(many=True, required=False, default=list)
+    revoke = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+
+    def validate(self, data):
+        granted = [grant['username'] for grant in data['grants']]
+        if len(granted) != len(set(granted)):
+            raise serializers.ValidationError('Each username may only be granted once')
+        if set(granted) & set(data['revoke']):
+            raise serializers.ValidationError('A username cannot be both granted and revoked')
+        if self.context['request'].user.username in granted:
+            raise serializers.ValidationError('Cannot share collection with yourself')
+        data['users'] = resolve_usernames(granted)
+        return data
+
+    def save(self, collection):
+        request_user = self.context['request'].user
+        grants = {grant['username']: grant['permission_level'] for grant in self.validated_data['grants']}
+        users = self.validated_data['users']
+
+        with transaction.atomic():
+            existing = {
+                share.shared_with_id: share
+                for share in collection.shares.select_for_update().filter(
+                    shared_with__in=[user.id for user in users.values()]
+                )
+            }
+            to_create, to_update = [], []
+            for username, level in grants.items():
+                share = existing.get(users[username].id)
+                if share is None:
+                    to_create.append(CollectionShare(collection=collection, shared_with=users[username],
+                                                     permission_level=level, created_by=request_user))
+                elif share.permission_level != level:
+                    share.permission_level = level
+                    to_update.append(share)
+
+            CollectionShare.objects.bulk_create(to_create)
+            CollectionShare.objects.bulk_update(to_update, ['permission_level'])
+            # Bulk operations skip model signals, so log them here
+            for verb, shares in [('created', to_create), ('updated', to_update)]:
+                for share in shares:
+                    activity.record(collection.pk, verb, 'share', share.pk,
+                                    shared_with=share.shared_with_id, permission_level=share.permission_level)
+            revoked, _ = collection.shares.filter(
+                shared_with__username__in=self.validated_data['revoke']
+            ).delete()
+
+        return {'created': len(to_create), 'updated': len(to_update), 'revoked': revoked}
+
+
+class ShareGroupSerializer(serializers.ModelSerializer):
+    owner = UserSerializer(read_only=True)
+    members = UserSerializer(many=True, read_only=True)
+    member_usernames = serializers.ListField(child=serializers.CharField(), write_only=True, required=False)
+    members_count = serializers.IntegerField(source='members.count', read_only=True)
+
+    class Meta:
+        model = ShareGroup
+        fields = ['id', 'name', 'owner', 'members', 'member_usernames', 'members_count', 'created_at']
+        read_only_fields = ['id', 'owner', 'created_at']
+
+    def validate_member_usernames(self, value):
+        return list(resolve_usernames(value).values())
+
+    def create(self, validated_data):
+        members = validated_data.pop('member_usernames', [])
+        validated_data['owner'] = self.context['request'].user
+        group = super().create(validated_data)
+        group.members.set(members)
+        return group
+
+    def update(self, instance, validated_data):
+        members = validated_data.pop('member_usernames', None)
+        group = super().update(instance, validated_data)
+        if members is not None:
+            group.members.set(members)
+        return group
+
+
+class CollectionGroupShareSerializer(serializers.ModelSerializer):
+    group_name = serializers.CharField(source='group.name', read_only=True)
+    created_by = UserSerializer(read_only=True)
+
+    class Meta:
+        model = CollectionGroupShare
+        fields = ['id', 'collection', 'group', 'group_name', 'permission_level', 'created_at', 'created_by']
+        read_only_fields = ['id', 'collection', 'created_at', 'created_by']
+
+    def validate_group(self, value):
+        if value.owner != self.context['request'].user:
+            raise serializers.ValidationError("You can only share with your own groups")
+        return value
+
+    def create(self, validated_data):
+        share, created = CollectionGroupShare.objects.update_or_create(
+            collection=validated_data['collection'],
+            group=validated_data['group'],
+            defaults={
+                'permission_level': validated_data.get('permission_level', 'view'),
+                'created_by': self.context['request'].user,
+            }
+        )
+        return share
+
+
+class ActivityEventSerializer(serializers.ModelSerializer):
+    actor_username = serializers.CharField(source='actor.username', read_only=True, default=None)
+
+    class Meta:
+        model = ActivityEvent
+        fields = ['id', 'actor', 'actor_username', 'verb', 'target_type', 'target_id', 'data', 'created_at']
+        read_only_fields = fields
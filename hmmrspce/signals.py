@@ -0,0 +1,78 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from . import activity
+from .models import Collection, Item, CollectionShare, CollectionGroupShare
+from .realtime import publish_on_commit
+from .stats import invalidate_collection_stats
+
+
+@receiver(pre_save, sender=Item)
+def item_moving(sender, instance, **kwargs):
+    """Invalidate stats of the previous collection when an item is moved"""
+    if instance.pk is None:
+        return
+    previous = Item.objects.filter(pk=instance.pk).values_list('collection_id', flat=True).first()
+    if previous is not None and previous != instance.collection_id:
+        invalidate_collection_stats(previous)
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+def item_changed(sender, instance, **kwargs):
+    """Invalidate cached stats for the item's collection"""
+    invalidate_collection_stats(instance.collection_id)
+
+
+def _verb(kwargs):
+    if 'created' not in kwargs:
+        return 'deleted'
+    return 'created' if kwargs['created'] else 'updated'
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+def log_item_activity(sender, instance, **kwargs):
+    activity.record(instance.collection_id, _verb(kwargs), 'item', instance.pk, name=instance.name)
+
+
+@receiver(post_save, sender=CollectionShare)
+@receiver(post_delete, sender=CollectionShare)
+def log_share_activity(sender, instance, **kwargs):
+    activity.record(instance.collection_id, _verb(kwargs), 'share', instance.pk,
+                    shared_with=instance.shared_with_id, permission_level=instance.permission_level)
+
+
+@receiver(post_save, sender=CollectionGroupShare)
+@receiver(post_delete, sender=CollectionGroupShare)
+def log_group_share_activity(sender, instance, **kwargs):
+    activity.record(instance.collection_id, _verb(kwargs), 'group_share', instance.pk,
+                    group=instance.group_id, permission_level=instance.permission_level)
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+def publish_item_change(sender, instance, **kwargs):
+    publish_on_commit(instance.collection_id, f'item.{_verb(kwargs)}', id=instance.pk)
+
+
+@receiver(post_save, sender=Collection)
+def withdraw_from_discovery(sender, instance, created, **kwargs):
+    """Drop collections that stopped being public from cached discovery feeds"""
+    if not created and (instance.visibility != 'public' or instance.deleted_at):
+        from .discovery import withdraw
+        withdraw(instance.pk)
+
+
+@receiver(post_delete, sender=Collection)
+def collection_deleted(sender, instance, **kwargs):
+    """The ranking row is removed by the cascade; cached pages still list the collection"""
+    if instance.visibility == 'public':
+        from .discovery import invalidate_feeds
+        transaction.on_commit(invalidate_feeds)
+
+
+@receiver(post_save, sender=Collection)
+def publish_collection_change(sender, instance, created, **kwargs):
+    if not created:
+        publish_on_commit(instance.pk, 'collection.updated', id=instance.pk)
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.db import NotSupportedError
+from django.db.models import Avg, BooleanField, Count, F, FloatField, Func, Max, Min, Sum, Value
+from django.db.models.functions import Cast
+from django.db.models.fields.json import KeyTextTransform, compile_json_path
+
+
+STATS_CACHE_TIMEOUT = 60 * 60
+MAX_STATS_FIELDS = 10
+MAX_STATS_GROUPS = 100
+AGGREGATES = {
+    'sum': Sum,
+    'avg': Avg,
+    'min': Min,
+    'max': Max,
+}
+
+
+def _version_key(collection_id):
+    return f'collection-stats-version:{collection_id}'
+
+
+def get_stats_version(collection_id):
+    """Return the current stats version for a collection"""
+    return cache.get_or_set(_version_key(collection_id), time.time_ns(), None)
+
+
+def invalidate_collection_stats(collection_id):
+    """Bump the stats version so cached results for the collection go stale"""
+    cache.set(_version_key(collection_id), time.time_ns(), None)
+
+
+class IsJSONNumber(Func):
+    """True where a top-level key of a JSON column holds a number (not a string or boolean)"""
+    output_field = BooleanField()
+
+    def __init__(self, field, key):
+        self.key = key
+        super().__init__(F(field))
+
+    def _compile(self, compiler, connection, template, key):
+        column, params = compiler.compile(self.source_expressions[0])
+        key_sql, key_params = compiler.compile(Value(key))
+        return template % {'column': column, 'key': key_sql}, (*params, *key_params)
+
+    def as_sqlite(self, compiler, connection):
+        return self._compile(compiler, connection, "json_type(%(column)s, %(key)s) IN ('integer', 'real')",
+                             compile_json_path([self.key]))
+
+    def as_postgresql(self, compiler, connection):
+        return self._compile(compiler, connection, "jsonb_typeof(%(column)s -> %(key)s) = 'number'", self.key)
+
+    def as_mysql(self, compiler, connection):
+        return self._compile(compiler, connection,
+                             "JSON_TYPE(JSON_EXTRACT(%(column)s, %(key)s)) IN ('INTEGER', 'DOUBLE', 'DECIMAL')",
+                             compile_json_path([self.key]))
+
+    def as_sql(self, compiler, connection, **extra_context):
+        # Aggregate FILTER clauses call as_sql() directly, bypassing vendor dispatch
+        vendor_sql = getattr(self, f'as_{connection.vendor}', None)
+        if vendor_sql is None:
+            raise NotSupportedError(f'Collection stats are not supported on {connection.vendor}')
+        return vendor_sql(compiler, connection)
+
+
+def _numeric(key):
+    return Cast(KeyTextTransform(key, 'custom_fields'), FloatField())
+
+
+def _field_aggregates(fields):
+    # Only JSON numbers are aggregated: casting other values would yield 0
+    # on SQLite and raise on PostgreSQL
+    aggregates = {}
+    for index, field in enumerate(fields):
+        is_number = IsJSONNumber('custom_fields', field)
+        for name, func in AGGREGATES.items():
+            aggregates[f'f{index}_{name}'] = func(_numeric(field), filter=is_number)
+    return aggregates
+
+
+def _unpack_fields(row, fields):
+    return {
+        field: {name: row[f'f{index}_{name}'] for name in AGGREGATES}
+        for index, field in enumerate(fields)
+    }
+
+
+def compute_collection_stats(collection, group_by=None, fields=()):
+    """
+    Aggregate a collection's items in the database.
+
+    Items are optionally grouped by the value of one ``custom_fields`` key and
+    sum/avg/min/max are computed for each numeric key in ``fields``; values
+    that aren't JSON numbers are ignored. Only the MAX_STATS_GROUPS largest
+    groups are returned.
+    """
+    items = collection.items.order_by()
+    aggregates = _field_aggregates(fields)
+
+    totals = items.aggregate(count=Count('id'), **aggregates)
+    result = {
+        'collection': collection.id,
+        'group_by': group_by,
+        'fields': list(fields),
+        'totals': {
+            'count': totals['count'],
+            'fields': _unpack_fields(totals, fields),
+        },
+    }
+
+    if group_by:
+        rows = list(
+            items.annotate(group_value=KeyTextTransform(group_by, 'custom_fields'))
+            .values('group_value')
+            .annotate(count=Count('id'), **aggregates)
+            .order_by('-count', 'group_value')[:MAX_STATS_GROUPS + 1]
+        )
+        result['groups'] = [
+            {
+                'value': row['group_value'],
+                'count': row['count'],
+                'fields': _unpack_fields(row, fields),
+            }
+            for row in rows[:MAX_STATS_GROUPS]
+        ]
+        result['groups_truncated'] = len(rows) > MAX_STATS_GROUPS
+
+    return result
+
+
+def get_collection_stats(collection, group_by=None, fields=()):
+    """Return collection stats, served from cache while the collection is unchanged"""
+    version = get_stats_version(collection.id)
+    # Hashed, so user-supplied names containing separators can't collide
+    params = hashlib.sha256(json.dumps([group_by, list(fields)]).encode()).hexdigest()
+    cache_key = f'collection-stats:{collection.id}:{version}:{params}'
+    stats = cache.get(cache_key)
+    if stats is None:
+        stats = compute_collection_stats(collection, group_by=group_by, fields=fields)
+        cache.set(cache_key, stats, STATS_CACHE_TIMEOUT)
+    return stats
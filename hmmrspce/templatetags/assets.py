@@ -0,0 +1,33 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+register = template.Library()
+
+
+@register.simple_tag
+def script_url(name):
+    """
+    URL of a frontend entry point.
+
+    Points at the esbuild bundle in ``dist/`` when USE_STATIC_BUNDLES is on,
+    otherwise at the per-module tsc output in ``js/``.
+    """
+    directory = 'dist' if getattr(settings, 'USE_STATIC_BUNDLES', False) else 'js'
+    return static(f'{directory}/{name}')
+
+
+@register.simple_tag
+def module_preloads(*names):
+    """
+    ``<link rel="modulepreload">`` tags for shared modules of the unbundled build.
+
+    Lets the browser fetch dependencies in parallel instead of discovering
+    them one import at a time. Bundles already contain them, so nothing is
+    emitted when USE_STATIC_BUNDLES is on.
+    """
+    if getattr(settings, 'USE_STATIC_BUNDLES', False):
+        return ''
+    return format_html_join('\n    ', '<link rel="modulepreload" href="{}">',
+                            ((static(f'js/{name}'),) for name in names))
@@ -1,3 +1,787 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import timedelta
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.admin.sites import site
+from django.contrib.auth.models import User
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import (
+    AsyncClient, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+from .backup import BackupError, iter_archive, restore_archive
+from .cloning import clone_collection
+from .discovery import refresh_rankings
+from .duplicates import MAX_BUCKET_SIZE, find_duplicates, find_matches
+from .fast_serializers import FastItemSerializer
+from .fingerprints import compute
+from .loadtest import seed
+from .management.commands.startup_report import parse_importtime
+from .models import (
+    ActivityEvent, Collection, CollectionGroupShare, CollectionShare, CollectionTemplate, Item,
+    ShareGroup,
+)
+from .purge import purge_collection, purge_user
+from .renderers import FastJSONRenderer
+from .serializers import ItemSerializer
+from . import activity, realtime
+from .checks import check_shared_cache
+from .stats import MAX_STATS_GROUPS, compute_collection_stats, get_collection_stats
+
+
+def make_items(collection, names, **fields):
+    items = []
+    for name in names:
+        item = Item(collection=collection, created_by=collection.created_by, name=name, **fields)
+        item.sync_derived_fields()
+        items.append(item)
+    return Item.objects.bulk_create(items, batch_size=1000)
+
+
+class FastSerializerTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('alice', email='alice@example.com', first_name='Alice')
+        self.viewer = User.objects.create_user('bob')
+        self.collection = Collection.objects.create(name='Books', created_by=self.owner)
+        CollectionShare.objects.create(collection=self.collection, shared_with=self.viewer,
+                                       created_by=self.owner, permission_level='edit')
+        Item.objects.create(collection=self.collection, created_by=self.owner, name='Emma',
+                            image='items/emma.png', visibility='public',
+                            custom_fields={'author': 'Austen', 'tags': ['novel'], 'meta': {'pages': 474}})
+        Item.objects.create(collection=self.collection, created_by=self.viewer, name='Persuasion',
+                            description='Line\u2028separated', custom_fields={'n': 2 ** 70})
+        Item.objects.create(collection=self.collection, created_by=self.owner, name='Notes',
+                            visibility='private')
+
+    def test_fast_list_output_matches_item_serializer(self):
+        queryset = Item.objects.order_by('pk')
+        for user in [self.owner, self.viewer]:
+            with self.subTest(user=user.username):
+                request = Request(APIRequestFactory().get('/api/items/'))
+                request.user = user
+                context = {'request': request}
+                expected = JSONRenderer().render(ItemSerializer(queryset, many=True, context=context).data)
+                fast = FastItemSerializer(FastItemSerializer.rows(queryset), context=context).data
+                self.assertEqual(json.loads(FastJSONRenderer().render(fast)), json.loads(expected))
+
+    def test_integers_beyond_64_bits_are_rendered(self):
+        item = Item.objects.get(name='Persuasion')
+        self.client.force_login(self.owner)
+
+        detail = self.client.get(f'/api/items/{item.pk}/')
+        listing = self.client.get('/api/items/', HTTP_ACCEPT='application/json; indent=2')
+
+        self.assertEqual(detail.status_code, 200)
+        self.assertEqual(detail.json()['custom_fields'], {'n': 2 ** 70})
+        self.assertEqual(listing.status_code, 200)
+        self.assertIn({'n': 2 ** 70}, [row['custom_fields'] for row in listing.json()['results']])
+
+
+class TemplateValidationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice')
+        self.template = CollectionTemplate.objects.create(
+            name='Books', slug='books', fields=[{'name': 'author', 'type': 'string', 'required': True}])
+        self.collection = Collection.objects.create(name='Books', created_by=self.user, template=self.template)
+        # Stored before the template required an author
+        self.item = Item.objects.create(collection=self.collection, created_by=self.user, name='Emma')
+        self.client.force_login(self.user)
+
+    def patch(self, data):
+        return self.client.patch(f'/api/items/{self.item.pk}/', data, content_type='application/json')
+
+    def test_patch_without_custom_fields_skips_stored_values(self):
+        response = self.patch({'description': 'A novel'})
+
+        self.assertEqual(response.status_code, 200)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.description, 'A novel')
+
+    def test_patch_with_custom_fields_validates_them(self):
+        response = self.patch({'custom_fields': {'author': 5}})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('author', response.json()['custom_fields'])
+
+    def test_moving_to_a_templated_collection_validates_stored_values(self):
+        self.item.collection = Collection.objects.create(name='Plain', created_by=self.user)
+        self.item.save()
+
+        response = self.patch({'collection': self.collection.pk})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class SharingTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('alice')
+        self.bob = User.objects.create_user('bob')
+        self.carol = User.objects.create_user('carol')
+        self.collection = Collection.objects.create(name='Books', created_by=self.owner)
+        self.item = Item.objects.create(collection=self.collection, created_by=self.owner, name='Emma')
+        self.group = ShareGroup.objects.create(name='Readers', owner=self.owner)
+
+    def bulk(self, data):
+        self.client.force_login(self.owner)
+        return self.client.post(f'/api/collections/{self.collection.pk}/shares/bulk/', data,
+                                content_type='application/json')
+
+    def levels(self):
+        return dict(self.collection.shares.values_list('shared_with__username', 'permission_level'))
+
+    def test_bulk_grant_update_and_revoke(self):
+        response = self.bulk({'grants': [{'username': 'bob', 'permission_level': 'view'},
+                                         {'username': 'carol', 'permission_level': 'edit'}]})
+        self.assertEqual(response.json(), {'created': 2, 'updated': 0, 'revoked': 0})
+
+        response = self.bulk({'grants': [{'username': 'bob', 'permission_level': 'manage'},
+                                         {'username': 'carol', 'permission_level': 'edit'}]})
+        self.assertEqual(response.json(), {'created': 0, 'updated': 1, 'revoked': 0})
+        self.assertEqual(self.levels(), {'bob': 'manage', 'carol': 'edit'})
+
+        response = self.bulk({'revoke': ['carol']})
+        self.assertEqual(response.json(), {'created': 0, 'updated': 0, 'revoked': 1})
+        self.assertEqual(self.levels(), {'bob': 'manage'})
+
+    def test_bulk_rejects_unknown_users_and_self_without_changes(self):
+        for grant in ['nobody', 'alice']:
+            with self.subTest(grant=grant):
+                response = self.bulk({'grants': [{'username': 'bob', 'permission_level': 'view'},
+                                                 {'username': grant, 'permission_level': 'view'}]})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(self.levels(), {})
+
+    def test_group_members_get_the_highest_granted_level(self):
+        self.group.members.add(self.bob)
+        CollectionGroupShare.objects.create(collection=self.collection, group=self.group,
+                                            created_by=self.owner, permission_level='edit')
+        CollectionShare.objects.create(collection=self.collection, shared_with=self.bob,
+                                       created_by=self.owner, permission_level='view')
+
+        self.assertEqual(self.collection.get_user_permission(self.bob), 'edit')
+        self.assertIsNone(self.collection.get_user_permission(self.carol))
+
+        self.client.force_login(self.bob)
+        response = self.client.patch(f'/api/items/{self.item.pk}/', {'description': 'A novel'},
+                                     content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_shared_collections_are_listed_once(self):
+        other = User.objects.create_user('dave')
+        self.group.members.add(self.bob, self.carol, other)
+        CollectionGroupShare.objects.create(collection=self.collection, group=self.group, created_by=self.owner)
+        for user in [self.bob, self.carol]:
+            CollectionShare.objects.create(collection=self.collection, shared_with=user, created_by=self.owner)
+        Item.objects.create(collection=self.collection, created_by=self.owner, name='Persuasion')
+
+        self.client.force_login(self.bob)
+        collections = self.client.get('/api/collections/').json()['results']
+        items = self.client.get('/api/items/').json()['results']
+
+        self.assertEqual([c['id'] for c in collections], [self.collection.pk])
+        self.assertEqual(len(items), 2)
+
+        self.client.force_login(User.objects.create_user('erin'))
+        self.assertEqual(self.client.get('/api/items/').json()['results'], [])
+
+
+class DuplicateDetectionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('collector')
+        self.collection = Collection.objects.create(name='Comics', created_by=self.user)
+
+    def test_near_duplicates_are_grouped(self):
+        make_items(self.collection, ['The Hobbit', 'Hobbit, The', 'Dune'], description='A fantasy novel')
+        make_items(self.collection, ['Fellowship of the Ring, Lord of the Rings',
+                                     'Lord of the Rings: The Fellowship of the Ring'])
+
+        groups = find_duplicates(Item.objects.all())
+
+        self.assertEqual(
+            sorted((group['reason'], len(group['items'])) for group in groups),
+            [('name', 2), ('similar', 2)],
+        )
+
+    def test_series_issue_numbers_are_not_similar(self):
+        make_items(self.collection, [f'Amazing Spider-Man #{n}' for n in range(1, 10001)])
+
+        start = time.perf_counter()
+        groups = find_duplicates(Item.objects.all())
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(groups, [])
+        self.assertLess(elapsed, 30)
+
+    def test_oversized_buckets_are_skipped(self):
+        # Identical text puts every item in the same bucket of every band
+        make_items(self.collection, [f'Copy {n}' for n in range(MAX_BUCKET_SIZE + 1)],
+                   description='same words ' * 20)
+        Item.objects.update(simhash=1, simhash_band0=1, simhash_band1=0, simhash_band2=0, simhash_band3=0)
+
+        self.assertEqual(find_duplicates(Item.objects.all()), [])
+
+    def test_matches_respect_issue_numbers(self):
+        make_items(self.collection, ['Amazing Spider-Man #12'])
+
+        def new(name):
+            return {'name': name, **compute(name, '', {})}
+
+        matches = find_matches(Item.objects.all(), [new('Amazing Spider-Man #13'), new('Amazing Spider Man #12')])
+
+        self.assertEqual([(m['index'], m['reason']) for m in matches], [(1, 'name')])
+
+
+class CloneTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('cloner')
+        self.collection = Collection.objects.create(name='Books', created_by=self.user)
+        make_items(self.collection, ['Dune', 'Emma'])
+
+    def test_cloned_timestamps_match_orm_format(self):
+        clone = clone_collection(self.collection, self.user)
+
+        def raw_timestamps(collection):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'SELECT created_at, updated_at FROM {Item._meta.db_table} WHERE collection_id = %s',
+                    [collection.pk],
+                )
+                return cursor.fetchall()
+
+        original = raw_timestamps(self.collection)[0]
+        for row in raw_timestamps(clone):
+            self.assertEqual([type(value) for value in row], [type(value) for value in original])
+            self.assertEqual([len(str(value)) for value in row], [len(str(value)) for value in original])
+        # Range filters compare cloned and ORM-written rows consistently
+        self.assertEqual(Item.objects.filter(created_at__lte=timezone.now()).count(), 4)
+
+    def test_clone_with_invalid_pk_is_not_found(self):
+        self.client.force_login(self.user)
+
+        response = self.client.post('/api/collections/abc/clone/')
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_clone_name_is_validated(self):
+        self.client.force_login(self.user)
+        url = f'/api/collections/{self.collection.pk}/clone/'
+
+        for name in [5, ['Books'], '', 'x' * 201]:
+            with self.subTest(name=name):
+                response = self.client.post(url, {'name': name}, content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('name', response.json())
+        response = self.client.post(url, {'name': 'My books'}, content_type='application/json')
+        self.assertEqual(response.json()['name'], 'My books')
+        self.assertEqual(self.client.post(url).json()['name'], 'Books (copy)')
+
+
+class CollectionStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('counter')
+        self.collection = Collection.objects.create(name='Shelf', created_by=self.user)
+
+    def add(self, **custom_fields):
+        Item.objects.create(collection=self.collection, created_by=self.user, name='Book',
+                            custom_fields=custom_fields)
+
+    def test_non_numeric_values_are_ignored(self):
+        self.add(pages=100, genre='sf')
+        self.add(pages=300.5, genre='sf')
+        self.add(pages='abc', genre='fantasy')
+        self.add(pages=True, genre='fantasy')
+        self.add(genre='fantasy')
+
+        stats = compute_collection_stats(self.collection, group_by='genre', fields=['pages'])
+
+        self.assertEqual(stats['totals']['count'], 5)
+        self.assertEqual(stats['totals']['fields']['pages'],
+                         {'sum': 400.5, 'avg': 200.25, 'min': 100.0, 'max': 300.5})
+        groups = {group['value']: group for group in stats['groups']}
+        self.assertEqual(groups['fantasy']['fields']['pages']['min'], None)
+        self.assertEqual(groups['sf']['count'], 2)
+
+    def test_groups_are_limited(self):
+        for n in range(MAX_STATS_GROUPS + 5):
+            self.add(isbn=str(n))
+
+        stats = compute_collection_stats(self.collection, group_by='isbn')
+
+        self.assertEqual(len(stats['groups']), MAX_STATS_GROUPS)
+        self.assertTrue(stats['groups_truncated'])
+
+    def test_cache_keys_do_not_collide(self):
+        self.add(**{'a:b': 'x', 'a': 'y', 'b:': 5})
+
+        first = get_collection_stats(self.collection, group_by='a:b')
+        second = get_collection_stats(self.collection, group_by='a', fields=['b:'])
+
+        self.assertEqual(first['groups'][0]['value'], 'x')
+        self.assertEqual(second, compute_collection_stats(self.collection, group_by='a', fields=['b:']))
+
+    def test_process_local_cache_is_flagged(self):
+        self.assertEqual(check_shared_cache(None), [])
+        local = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with override_settings(CACHES=local):
+            self.assertEqual([w.id for w in check_shared_cache(None)], ['hmmrspce.W001'])
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class BackupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('archivist')
+        self.collection = Collection.objects.create(name='Books', created_by=self.user)
+        self.item = Item.objects.create(collection=self.collection, created_by=self.user, name='Dune',
+                                        image=SimpleUploadedFile('dune.png', b'cover'))
+        self.created_at = timezone.now() - timedelta(days=400)
+        Item.objects.filter(pk=self.item.pk).update(created_at=self.created_at)
+        Collection.objects.filter(pk=self.collection.pk).update(created_at=self.created_at)
+        self.storage = Item._meta.get_field('image').storage
+
+    def export(self):
+        return io.BytesIO(b''.join(iter_archive(self.user)))
+
+    def test_round_trip_keeps_creation_times(self):
+        counts = restore_archive(self.export(), self.user)
+
+        self.assertEqual(counts['items'], 1)
+        restored = Item.objects.exclude(pk=self.item.pk).get()
+        self.assertEqual(restored.created_at, self.created_at)
+        self.assertEqual(restored.collection.created_at, self.created_at)
+        self.assertNotEqual(restored.collection_id, self.collection.pk)
+
+    def rewrite(self, archive, **replacements):
+        """Copy an archive, replacing (or with None, dropping) some of its entries"""
+        source = zipfile.ZipFile(archive)
+        output = io.BytesIO()
+        with zipfile.ZipFile(output, 'w') as target:
+            for name in source.namelist():
+                if name not in replacements:
+                    target.writestr(name, source.read(name))
+            for name, data in replacements.items():
+                if data is not None:
+                    target.writestr(name, data)
+        output.seek(0)
+        return output
+
+    def test_invalid_archives_raise_backup_error(self):
+        archive = self.export()
+        blob = next(name for name in zipfile.ZipFile(archive).namelist() if name.startswith('blobs/'))
+        cases = {
+            'missing collections': {'collections.ndjson': None},
+            'missing key': {'collections.ndjson': '{"id": 1}\n'},
+            'not an object': {'collections.ndjson': '[1, 2]\n'},
+            'missing blob': {blob: None},
+        }
+        for label, replacements in cases.items():
+            with self.subTest(label):
+                with self.assertRaises(BackupError):
+                    restore_archive(self.rewrite(archive, **replacements), self.user)
+                self.assertEqual(Collection.objects.count(), 1)
+
+    def test_invalid_rows_raise_backup_error(self):
+        template = CollectionTemplate.objects.create(
+            name='Books', slug='books', fields=[{'name': 'pages', 'type': 'integer', 'required': True}]
+        )
+        Collection.objects.filter(pk=self.collection.pk).update(template=template)
+        Item.objects.filter(pk=self.item.pk).update(custom_fields={'pages': 100})
+        CollectionShare.objects.create(collection=self.collection, created_by=self.user,
+                                       shared_with=User.objects.create_user('reader'))
+        archive = self.export()
+
+        def changed(name, **values):
+            row = json.loads(zipfile.ZipFile(archive).read(name))
+            return self.rewrite(archive, **{name: json.dumps({**row, **values}) + '\n'})
+
+        cases = {
+            'collection visibility': changed('collections.ndjson', visibility='secret'),
+            'item visibility': changed('items.ndjson', visibility='everyone'),
+            'share permission': changed('shares.ndjson', permission_level='admin'),
+            'custom fields type': changed('items.ndjson', custom_fields=['pages']),
+            'template mismatch': changed('items.ndjson', custom_fields={'pages': 'many'}),
+        }
+        for label, broken in cases.items():
+            with self.subTest(label):
+                with self.assertRaises(BackupError):
+                    restore_archive(broken, self.user)
+                self.assertEqual(Collection.objects.count(), 1)
+
+        restore_archive(archive, self.user)
+        self.assertEqual(Collection.objects.exclude(pk=self.collection.pk).get().template, template)
+
+    def test_failed_restore_removes_saved_images(self):
+        archive = self.export()
+        items = zipfile.ZipFile(archive).read('items.ndjson').decode()
+        # A second item whose blob is missing fails after the first image is saved
+        row = json.loads(items)
+        row.update(id=row['id'] + 1, image_blob='0' * 64)
+        broken = self.rewrite(archive, **{'items.ndjson': items + json.dumps(row) + '\n'})
+        before = set(self.storage.listdir('items')[1])
+
+        with self.assertRaises(BackupError):
+            restore_archive(broken, self.user)
+
+        self.assertEqual(set(self.storage.listdir('items')[1]), before)
+
+    def test_restore_endpoint_rejects_invalid_archive(self):
+        self.client.force_login(self.user)
+        upload = SimpleUploadedFile('backup.zip', self.rewrite(self.export(), **{'items.ndjson': None}).read())
+
+        response = self.client.post('/api/users/me/restore/', {'archive': upload})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class DiscoveryFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('curator', email='curator@example.com')
+        for n in range(3):
+            collection = Collection.objects.create(name=f'Public {n}', created_by=self.owner, visibility='public')
+            make_items(collection, [f'Item {i}' for i in range(n)], visibility='public')
+        refresh_rankings()
+
+    def test_anonymous_feed_hides_owner_email(self):
+        response = self.client.get('/api/collections/public/?feed=popular')
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([result['items_count'] for result in results], [2, 1, 0])
+        self.assertNotIn('curator@example.com', response.content.decode())
+        self.assertNotIn('email', results[0]['created_by'])
+
+    def test_pages_follow_the_cursor(self):
+        first = self.client.get('/api/collections/public/?feed=popular&page_size=2').json()
+        second = self.client.get(first['next']).json()
+
+        self.assertEqual([r['name'] for r in first['results'] + second['results']],
+                         ['Public 2', 'Public 1', 'Public 0'])
+        self.assertIsNone(second['next'])
+
+    def feed_names(self):
+        return [r['name'] for r in self.client.get('/api/collections/public/?feed=popular').json()['results']]
+
+    def test_collections_that_leave_public_disappear_from_cached_pages(self):
+        self.assertEqual(self.feed_names(), ['Public 2', 'Public 1', 'Public 0'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            private = Collection.objects.get(name='Public 2')
+            private.visibility = 'private'
+            private.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            Collection.objects.get(name='Public 1').soft_delete()
+        self.assertEqual(self.feed_names(), ['Public 0'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Collection.objects.get(name='Public 0').delete()
+        self.assertEqual(self.feed_names(), [])
+
+    def test_load_test_seed_ranks_its_public_collections(self):
+        seed(users=1, collections_per_user=2, items_per_collection=2, fanout_users=0)
+
+        self.assertIn('Load test 0', self.feed_names())
+        self.assertNotIn('Load test 1', self.feed_names())
+
+    def test_malformed_cursors_are_rejected(self):
+        for feed, position in [('popular', [[1], 1]), ('popular', [True, 1]), ('popular', ['2', 1]),
+                               ('recent', [5, 1]), ('recent', ['2024-01-01T00:00:00', '1'])]:
+            with self.subTest(feed=feed, position=position):
+                cursor = base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+                response = self.client.get('/api/collections/public/', {'feed': feed, 'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class SoftDeleteAndPurgeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner')
+        self.other = User.objects.create_user('friend')
+        self.collection = Collection.objects.create(name='Books', created_by=self.user)
+        self.item = Item.objects.create(collection=self.collection, created_by=self.user, name='Dune',
+                                        image=SimpleUploadedFile('dune.png', b'cover'))
+        self.image = self.item.image.name
+        self.storage = Item._meta.get_field('image').storage
+
+    def test_soft_delete_hides_collection_and_items(self):
+        self.client.force_login(self.user)
+
+        response = self.client.delete(f'/api/collections/{self.collection.pk}/')
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Collection.objects.filter(pk=self.collection.pk).exists())
+        self.assertTrue(Collection.all_objects.filter(pk=self.collection.pk).exists())
+        self.assertEqual(self.client.get('/api/collections/').json()['results'], [])
+        self.assertEqual(self.client.get('/api/items/').json()['results'], [])
+        self.assertEqual(self.client.get(f'/api/items/{self.item.pk}/').status_code, 404)
+
+    def test_purge_keeps_images_still_referenced_by_a_clone(self):
+        clone = clone_collection(self.collection, self.other)
+        self.collection.soft_delete()
+
+        purge_collection(self.collection)
+
+        self.assertFalse(Item.objects.filter(pk=self.item.pk).exists())
+        self.assertTrue(self.storage.exists(self.image))
+
+        clone.soft_delete()
+        result = purge_collection(clone)
+
+        self.assertEqual(result, {'items': 1, 'files': 1})
+        self.assertFalse(self.storage.exists(self.image))
+
+    def test_purge_user_removes_owned_and_contributed_data(self):
+        shared = Collection.objects.create(name='Shared', created_by=self.other)
+        CollectionShare.objects.create(collection=shared, shared_with=self.user, created_by=self.other,
+                                       permission_level='edit')
+        Item.objects.create(collection=shared, created_by=self.user, name='Emma')
+        kept = Item.objects.create(collection=shared, created_by=self.other, name='Persuasion')
+
+        result = purge_user(self.user)
+
+        self.assertEqual(result, {'collections': 1, 'items': 2, 'files': 1})
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertEqual(list(Item.objects.values_list('pk', flat=True)), [kept.pk])
+        self.assertFalse(CollectionShare.objects.exists())
+        self.assertFalse(self.storage.exists(self.image))
+
+
+class AdminSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice')
+        self.other = User.objects.create_user('Bob')
+        self.novels = Collection.objects.create(name='Novels', created_by=self.user)
+        self.poems = Collection.objects.create(name='Poems', created_by=self.other)
+        self.request = RequestFactory().get('/')
+
+    def search(self, model, term):
+        queryset, may_have_duplicates = site._registry[model].get_search_results(
+            self.request, model.objects.all(), term)
+        self.assertFalse(may_have_duplicates)
+        return set(queryset)
+
+    def test_collection_search_matches_name_prefix_or_exact_owner(self):
+        self.assertEqual(self.search(Collection, 'Nov'), {self.novels})
+        self.assertEqual(self.search(Collection, 'vels'), set())
+        self.assertEqual(self.search(Collection, 'Bob'), {self.poems})
+        self.assertEqual(self.search(Collection, 'bo'), set())
+        self.assertEqual(self.search(Collection, ' '), {self.novels, self.poems})
+
+    def test_share_search_matches_username_or_collection_prefix(self):
+        share = CollectionShare.objects.create(collection=self.novels, shared_with=self.other,
+                                               created_by=self.user)
+        self.assertEqual(self.search(CollectionShare, 'Bob'), {share})
+        self.assertEqual(self.search(CollectionShare, 'Novel'), {share})
+        self.assertEqual(self.search(CollectionShare, 'Poems'), set())
+
+
+class StubBroker(realtime.Broker):
+    def __init__(self):
+        self.published = []
+
+    def publish(self, channel, event):
+        self.published.append((channel, event))
+
+
+class RealtimeTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('alice')
+        self.manager = User.objects.create_user('bob')
+        self.member = User.objects.create_user('carol')
+        self.stranger = User.objects.create_user('dave')
+        self.collection = Collection.objects.create(name='Books', created_by=self.owner)
+        CollectionShare.objects.create(collection=self.collection, shared_with=self.manager,
+                                       created_by=self.owner, permission_level='manage')
+        group = ShareGroup.objects.create(name='Readers', owner=self.owner)
+        group.members.add(self.member)
+        CollectionGroupShare.objects.create(collection=self.collection, group=group, created_by=self.owner)
+        self.broker = StubBroker()
+        realtime.set_broker(self.broker)
+        self.addCleanup(realtime.set_broker, None)
+
+    def ticket_status(self, user):
+        self.client.force_login(user)
+        return self.client.post(f'/api/collections/{self.collection.pk}/events/ticket/').status_code
+
+    def test_ticket_is_issued_to_every_user_who_can_view(self):
+        for user in [self.owner, self.manager, self.member]:
+            with self.subTest(user=user.username):
+                self.assertEqual(self.ticket_status(user), 200)
+        self.assertEqual(self.ticket_status(self.stranger), 404)
+
+    def test_wsgi_requests_get_no_stream(self):
+        self.client.force_login(self.owner)
+        response = self.client.post(f'/api/collections/{self.collection.pk}/events/ticket/')
+        self.assertIsNone(response.json()['url'])
+
+        ticket = realtime.make_ticket(self.owner, self.collection.pk)
+        response = self.client.get(f'/api/collections/{self.collection.pk}/events/', {'ticket': ticket})
+        self.assertEqual(response.status_code, 204)
+
+    def test_changes_are_published_on_commit_only(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            item = Item.objects.create(collection=self.collection, created_by=self.owner, name='Emma')
+        self.assertEqual(self.broker.published, [
+            (f'collection:{self.collection.pk}',
+             {'type': 'item.created', 'collection': self.collection.pk, 'id': item.pk}),
+        ])
+
+        self.broker.published.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Item.objects.create(collection=self.collection, created_by=self.owner, name='Persuasion')
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(self.broker.published, [])
+
+    async def test_asgi_stream_delivers_published_events(self):
+        realtime.set_broker(realtime.LocalBroker())
+        ticket = realtime.make_ticket(self.owner, self.collection.pk)
+        response = await AsyncClient().get(f'/api/collections/{self.collection.pk}/events/', {'ticket': ticket})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        chunks = aiter(response.streaming_content)
+        self.assertTrue((await anext(chunks)).startswith(b'retry:'))
+        realtime.get_broker().publish(realtime.collection_channel(self.collection.pk), {'type': 'item.updated'})
+        self.assertEqual(await anext(chunks), b'data: {"type": "item.updated"}\n\n')
+        await chunks.aclose()
+
+
+@override_settings(STATIC_ROOT=tempfile.mkdtemp())
+class StaticAssetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def test_assets_are_hashed_and_compressed(self):
+        items = staticfiles_storage.stored_name('js/items.js')
+        api = staticfiles_storage.stored_name('js/api.js')
+
+        self.assertNotEqual(items, 'js/items.js')
+        self.assertTrue(staticfiles_storage.exists(items + '.gz'))
+        with staticfiles_storage.open(items) as f:
+            self.assertIn(f"./{api.split('/')[-1]}", f.read().decode())
+
+    def test_pages_link_hashed_assets(self):
+        response = self.client.get('/')
+
+        self.assertContains(response, staticfiles_storage.url('js/home.js'))
+        self.assertContains(response, staticfiles_storage.url('css/main.css'))
+
+
+class ActivityTests(TransactionTestCase):
+    # Real commits, so on_commit callbacks run where they would in production
+    def setUp(self):
+        self.user = User.objects.create_user('logger')
+        self.collection = Collection.objects.create(name='Books', created_by=self.user)
+        self.token = Token.objects.create(user=self.user)
+
+    def events(self):
+        return list(ActivityEvent.objects.filter(collection=self.collection).order_by('id'))
+
+    def test_request_events_are_written_with_one_insert(self):
+        self.client.force_login(self.user)
+        insert = f'INSERT INTO "{ActivityEvent._meta.db_table}"'
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/items/bulk/', {
+                'collection': self.collection.pk,
+                'items': [{'name': f'Book {n}'} for n in range(3)],
+            }, content_type='application/json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len([q for q in queries if q['sql'].startswith(insert)]), 1)
+        self.assertEqual([e.data['name'] for e in self.events()], ['Book 0', 'Book 1', 'Book 2'])
+
+    def test_rolled_back_changes_leave_no_events(self):
+        token = activity.start_buffer()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Item.objects.create(collection=self.collection, created_by=self.user, name='Lost')
+            raise RuntimeError
+        Item.objects.create(collection=self.collection, created_by=self.user, name='Kept')
+        activity.flush(token)
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Item.objects.create(collection=self.collection, created_by=self.user, name='Unbuffered')
+            raise RuntimeError
+
+        self.assertEqual([e.data['name'] for e in self.events()], ['Kept'])
+
+    def test_actor_is_the_token_user(self):
+        response = self.client.post('/api/items/', {'collection': self.collection.pk, 'name': 'Dune'},
+                                    content_type='application/json',
+                                    HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([e.actor for e in self.events()], [self.user])
+
+    def test_feed_pages_follow_the_cursor(self):
+        for n in range(5):
+            Item.objects.create(collection=self.collection, created_by=self.user, name=f'Book {n}')
+        self.client.force_login(self.user)
+
+        names = []
+        url = f'/api/collections/{self.collection.pk}/activity/?page_size=2'
+        while url:
+            page = self.client.get(url).json()
+            names += [event['data']['name'] for event in page['results']]
+            url = page['next']
+
+        self.assertEqual(names, [f'Book {n}' for n in reversed(range(5))])
+
+
+class StartupProfileTests(SimpleTestCase):
+    FEATURE_MODULES = ['hmmrspce.backup', 'hmmrspce.cloning', 'hmmrspce.discovery',
+                       'hmmrspce.duplicates', 'hmmrspce.fast_serializers']
+
+    def booted_modules(self, profile):
+        script = ('import sys, django; django.setup(); from django.urls import get_resolver; '
+                  'get_resolver().url_patterns; print(" ".join(sys.modules))')
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                                cwd=settings.BASE_DIR, env={**os.environ, 'DJANGO_SETTINGS_MODULE': profile})
+        return set(result.stdout.split())
+
+    def test_profiles_skip_what_they_do_not_serve(self):
+        api = self.booted_modules('collectionapp.settings_api')
+        public = self.booted_modules('collectionapp.settings_public')
+
+        self.assertIn('hmmrspce.views', api)
+        self.assertNotIn('hmmrspce.template_views', api)
+        self.assertIn('hmmrspce.template_views', public)
+        self.assertFalse({'rest_framework', 'hmmrspce.views'} & public)
+        for modules in (api, public):
+            self.assertFalse(set(self.FEATURE_MODULES) & modules)
+
+    def test_startup_report(self):
+        out = io.StringIO()
+        call_command('startup_report', profile='collectionapp.settings_api', top=3, stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], 'Profile: collectionapp.settings_api')
+        self.assertEqual(len(lines[lines.index('') + 2:]), 3)
+
+    def test_parse_importtime(self):
+        output = ('import time: self [us] | cumulative | imported package\n'
+                  'import time:       120 |        450 |   django.conf\n'
+                  'some other stderr line\n')
+
+        self.assertEqual(parse_importtime(output), [('django.conf', 120, 450)])
@@ -1,22 +1,12 @@
+from django.conf import settings
 from django.urls import path, include
-from rest_framework.routers import DefaultRouter
-from . import views, template_views
 
-router = DefaultRouter()
-router.register(r'collections', views.CollectionViewSet, basename='collection')
-router.register(r'items', views.ItemViewSet, basename='item')
-router.register(r'users', views.UserViewSet)
+urlpatterns = []
 
-urlpatterns = [
-    # Template views
-    path('', template_views.home, name='home'),
-    path('collections/', template_views.collections, name='collections'),
-    path('collections/<int:collection_id>/items/', template_views.collection_items, name='collection_items'),
-    path('public/', template_views.public_collections, name='public_collections'),
-    
-    # API routes
-    path('api/', include(router.urls)),
-    path('api/auth/register/', views.register, name='register'),
-    path('api/auth/login/', views.login, name='login'),
-    path('api/auth/logout/', views.logout, name='logout'),
-]
\ No newline at end of file
+# Page and API routes are included only for the profiles that serve them,
+# so API-only workers never import the template views and vice versa.
+if getattr(settings, 'SERVE_PAGES', True):
+    urlpatterns.append(path('', include('hmmrspce.page_urls')))
+
+if getattr(settings, 'SERVE_API', True):
+    urlpatterns.append(path('api/', include('hmmrspce.api_urls')))
@@ -1,16 +1,32 @@
+import json
+
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action, api_view, permission_classes, authentication_classes
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
+from rest_framework.utils.urls import replace_query_param
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
 from django.db.models import Q
-from .models import Collection, Item, CollectionShare
+from django.utils.cache import patch_cache_control
+from .models import Collection, CollectionTemplate, Item, CollectionShare, ShareGroup
 from .serializers import (
-    CollectionSerializer, ItemSerializer, UserSerializer,
-    PublicCollectionSerializer, PublicItemSerializer,
-    UserRegistrationSerializer, LoginSerializer, CollectionShareSerializer
+    CollectionSerializer, CollectionTemplateSerializer, ItemSerializer, UserSerializer,
+    PublicCollectionSerializer,
+    UserRegistrationSerializer, LoginSerializer, CollectionShareSerializer,
+    BulkShareSerializer, ShareGroupSerializer, CollectionGroupShareSerializer,
+    ActivityEventSerializer, BulkItemSerializer, BulkItemCreateSerializer, CloneSerializer
 )
-from .permissions import IsOwnerOrSharedAccess, CanViewPublicContent
+from .pagination import ActivityCursorPagination
+from .permissions import IsOwnerOrSharedAccess, CanViewCollection, CanViewPublicContent
+# stats, activity and realtime are loaded at startup by signals anyway. Feature
+# modules (backup, cloning, discovery, duplicates, fast serializers) are
+# imported by the actions that use them, so workers don't pay for them at boot
+from .stats import get_collection_stats, invalidate_collection_stats, MAX_STATS_FIELDS
+from . import activity, fingerprints, realtime
 
 
 class CollectionViewSet(viewsets.ModelViewSet):
@@ -20,15 +36,38 @@ class CollectionViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         user = self.request.user
         # Get collections owned by user or shared with user
-        owned = Collection.objects.filter(created_by=user)
-        shared = Collection.objects.filter(shares__shared_with=user)
-        return (owned | shared).distinct()
+        return Collection.objects.filter(
+            Q(created_by=user) | Collection.shared_with_q(user)
+        )
 
-    @action(detail=False, methods=['get'])
+    def perform_destroy(self, instance):
+        # Large collections are purged in batches by purge_deleted_collections
+        instance.soft_delete()
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny])
     def public(self, request):
-        public_collections = Collection.objects.filter(visibility='public')
-        serializer = PublicCollectionSerializer(public_collections, many=True)
-        return Response(serializer.data)
+        """Discovery feed of public collections (?feed=recent|popular&template=<slug>)"""
+        from . import discovery
+
+        feed = request.query_params.get('feed', 'recent')
+        try:
+            page_size = min(int(request.query_params.get('page_size', discovery.DEFAULT_PAGE_SIZE)),
+                            discovery.MAX_PAGE_SIZE)
+        except ValueError:
+            page_size = discovery.DEFAULT_PAGE_SIZE
+        try:
+            page = discovery.get_feed_page(feed, template=request.query_params.get('template'),
+                                           cursor=request.query_params.get('cursor'),
+                                           page_size=max(page_size, 1))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        next_url = None
+        if page['next_cursor']:
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', page['next_cursor'])
+        response = Response({'next': next_url, 'results': page['results']})
+        patch_cache_control(response, public=True, max_age=60)
+        return response
     
     @action(detail=False, methods=['get'])
     def unlisted(self, request):
@@ -37,6 +76,59 @@ class CollectionViewSet(viewsets.ModelViewSet):
         serializer = PublicCollectionSerializer(unlisted_collections, many=True)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['post'])
+    def clone(self, request, pk=None):
+        """Copy a collection, including public templates, into the user's collections"""
+        from .cloning import clone_collection
+
+        source = Collection.objects.filter(pk=pk).first() if str(pk).isdigit() else None
+        if source is None or not source.can_user_access(request.user):
+            return Response({'error': 'Collection not found'}, status=status.HTTP_404_NOT_FOUND)
+        options = CloneSerializer(data=request.data)
+        options.is_valid(raise_exception=True)
+
+        # Private items of other users are only copied for owners and share members
+        include_private = (source.created_by == request.user or
+                           source.get_shared_permission(request.user) is not None)
+        clone = clone_collection(source, request.user, name=options.validated_data.get('name'),
+                                 include_private=include_private)
+        serializer = self.get_serializer(clone)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'])
+    def activity(self, request, pk=None):
+        """Newest-first feed of changes to the collection's items and shares"""
+        collection = self.get_object()
+        events = collection.activity.select_related('actor')
+        paginator = ActivityCursorPagination()
+        page = paginator.paginate_queryset(events, request, view=self)
+        serializer = ActivityEventSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['post'], url_path='events/ticket',
+            permission_classes=[permissions.IsAuthenticated, CanViewCollection])
+    def events_ticket(self, request, pk=None):
+        """Short-lived URL for subscribing to the collection's change stream (null if unavailable)"""
+        collection = self.get_object()
+        if not realtime.can_stream(request):
+            return Response({'url': None, 'expires_in': None})
+        ticket = realtime.make_ticket(request.user, collection.pk)
+        url = reverse('collection-events', args=[collection.pk])
+        return Response({'url': f'{url}?ticket={ticket}', 'expires_in': realtime.TICKET_MAX_AGE})
+
+    @action(detail=True, methods=['get'])
+    def stats(self, request, pk=None):
+        """Aggregate custom_fields values across the collection's items"""
+        collection = self.get_object()
+        group_by = request.query_params.get('group_by') or None
+        fields = [f for f in request.query_params.get('fields', '').split(',') if f]
+
+        if len(fields) > MAX_STATS_FIELDS:
+            return Response({'error': f'At most {MAX_STATS_FIELDS} fields can be aggregated'},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(get_collection_stats(collection, group_by=group_by, fields=fields))
+
     @action(detail=True, methods=['get', 'post'])
     def shares(self, request, pk=None):
         """Manage collection sharing"""
@@ -59,6 +151,49 @@ class CollectionViewSet(viewsets.ModelViewSet):
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=True, methods=['post'], url_path='shares/bulk')
+    def bulk_shares(self, request, pk=None):
+        """Grant, update and revoke many user shares in one transaction"""
+        collection = self.get_object()
+
+        if collection.created_by != request.user:
+            return Response({'error': 'Only collection owner can manage shares'}, 
+                          status=status.HTTP_403_FORBIDDEN)
+
+        serializer = BulkShareSerializer(data=request.data, context={'request': request})
+        if serializer.is_valid():
+            return Response(serializer.save(collection=collection))
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=True, methods=['get', 'post', 'delete'], url_path='group-shares')
+    def group_shares(self, request, pk=None):
+        """Manage sharing a collection with share groups"""
+        collection = self.get_object()
+
+        if collection.created_by != request.user:
+            return Response({'error': 'Only collection owner can manage shares'}, 
+                          status=status.HTTP_403_FORBIDDEN)
+
+        if request.method == 'GET':
+            shares = collection.group_shares.select_related('group', 'created_by')
+            serializer = CollectionGroupShareSerializer(shares, many=True)
+            return Response(serializer.data)
+
+        elif request.method == 'POST':
+            serializer = CollectionGroupShareSerializer(data=request.data, context={'request': request})
+            if serializer.is_valid():
+                serializer.save(collection=collection)
+                return Response(serializer.data, status=status.HTTP_201_CREATED)
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        elif request.method == 'DELETE':
+            group_id = request.query_params.get('group', '')
+            if not group_id.isdigit():
+                return Response({'error': 'group query parameter is required'},
+                              status=status.HTTP_400_BAD_REQUEST)
+            collection.group_shares.filter(group_id=group_id).delete()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
 
 class ItemViewSet(viewsets.ModelViewSet):
     serializer_class = ItemSerializer
@@ -70,8 +205,8 @@ class ItemViewSet(viewsets.ModelViewSet):
         
         # Get items from collections user owns or has access to
         accessible_collections = Collection.objects.filter(
-            Q(created_by=user) | Q(shares__shared_with=user)
-        ).distinct()
+            Q(created_by=user) | Collection.shared_with_q(user)
+        )
         
         queryset = Item.objects.filter(collection__in=accessible_collections)
         
@@ -80,18 +215,117 @@ class ItemViewSet(viewsets.ModelViewSet):
         
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        # Read path skips ItemSerializer and model instances; output is identical
+        from .fast_serializers import FastItemSerializer
+
+        rows = FastItemSerializer.rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            serializer = FastItemSerializer(page, context=self.get_serializer_context())
+            return self.get_paginated_response(serializer.data)
+        serializer = FastItemSerializer(rows, context=self.get_serializer_context())
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def duplicates(self, request):
+        """Groups of duplicate items (same ISBN, same name or near-identical text)"""
+        from .duplicates import find_duplicates
+
+        return Response({'groups': find_duplicates(self.get_queryset())})
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Import many items into a collection, reporting or skipping duplicates"""
+        from .duplicates import find_matches
+
+        serializer = BulkItemCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        collection = Collection.objects.filter(pk=serializer.validated_data['collection']).first()
+        if collection is None or not collection.can_user_access(request.user):
+            return Response({'error': 'Collection not found'}, status=status.HTTP_404_NOT_FOUND)
+        if collection.get_user_permission(request.user) not in ['edit', 'manage', 'owner']:
+            return Response({'error': 'You cannot add items to this collection'},
+                          status=status.HTTP_403_FORBIDDEN)
+
+        items_serializer = BulkItemSerializer(
+            data=serializer.validated_data['items'], many=True,
+            context={**self.get_serializer_context(), 'collection': collection}
+        )
+        items_serializer.is_valid(raise_exception=True)
+
+        items = []
+        for data in items_serializer.validated_data:
+            item = Item(collection=collection, created_by=request.user, **data)
+            item.sync_derived_fields()
+            items.append(item)
+
+        # Duplicates are checked against the collection owner's whole catalog
+        catalog = Item.objects.filter(collection__created_by=collection.created_by_id,
+                                      collection__deleted_at__isnull=True)
+        fingerprint_fields = list(fingerprints.compute('', '', {}))
+        matches = find_matches(catalog, [
+            {'name': item.name, **{field: getattr(item, field) for field in fingerprint_fields}}
+            for item in items
+        ])
+
+        if serializer.validated_data['skip_duplicates']:
+            skipped = {match['index'] for match in matches}
+            items = [item for index, item in enumerate(items) if index not in skipped]
+
+        with transaction.atomic():
+            Item.objects.bulk_create(items, batch_size=500)
+            for item in items:
+                activity.record(collection.pk, 'created', 'item', item.pk, name=item.name)
+            # bulk_create skips post_save, so subscribers get one event for the batch
+            realtime.publish_on_commit(collection.pk, 'items.created', ids=[item.pk for item in items])
+        invalidate_collection_stats(collection.pk)
+
+        return Response({
+            'created': len(items),
+            'ids': [item.pk for item in items],
+            'duplicates': matches,
+        }, status=status.HTTP_201_CREATED)
+
     @action(detail=False, methods=['get'])
     def public(self, request):
+        from .fast_serializers import FastPublicItemSerializer
+
         collection_id = request.query_params.get('collection', None)
         
-        queryset = Item.objects.filter(visibility='public')
+        queryset = Item.objects.filter(visibility='public', collection__deleted_at__isnull=True)
         if collection_id:
             queryset = queryset.filter(collection_id=collection_id)
         
-        serializer = PublicItemSerializer(queryset, many=True)
+        serializer = FastPublicItemSerializer(FastPublicItemSerializer.rows(queryset),
+                                              context=self.get_serializer_context())
         return Response(serializer.data)
 
 
+class ShareGroupViewSet(viewsets.ModelViewSet):
+    serializer_class = ShareGroupSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return ShareGroup.objects.filter(owner=self.request.user).prefetch_related('members')
+
+
+class CollectionTemplateViewSet(viewsets.ReadOnlyModelViewSet):
+    """Template schemas change rarely, so clients may cache them for a day"""
+    queryset = CollectionTemplate.objects.all()
+    serializer_class = CollectionTemplateSerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = None
+    lookup_field = 'slug'
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            patch_cache_control(response, public=True, max_age=60 * 60 * 24)
+        return response
+
+
 class UserViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -102,6 +336,80 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = self.get_serializer(request.user)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'], url_path='me/export')
+    def export(self, request):
+        """Stream a backup archive of the user's collections (optionally ?collection=1,2)"""
+        from django.core.handlers.asgi import ASGIRequest
+        from .backup import aiter_archive, iter_archive
+
+        collection_ids = None
+        if request.query_params.get('collection'):
+            collection_ids = [int(pk) for pk in request.query_params['collection'].split(',') if pk.isdigit()]
+        if isinstance(request._request, ASGIRequest):
+            chunks = aiter_archive(request.user, collection_ids)
+        else:
+            chunks = iter_archive(request.user, collection_ids)
+        response = StreamingHttpResponse(chunks, content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="hammerspace-{request.user.username}.zip"'
+        return response
+
+    @action(detail=False, methods=['post'], url_path='me/restore')
+    def restore(self, request):
+        """Restore an uploaded backup archive (multipart field 'archive') into the user's account"""
+        from .backup import restore_archive, BackupError
+
+        archive = request.FILES.get('archive')
+        if archive is None:
+            return Response({'error': 'archive file is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            counts = restore_archive(archive, request.user)
+        except BackupError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(counts, status=status.HTTP_201_CREATED)
+
+
+def _can_subscribe(user_id, collection_id):
+    collection = Collection.objects.filter(pk=collection_id).first()
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    return collection is not None and user is not None and collection.can_user_access(user)
+
+
+async def collection_events(request, pk):
+    """
+    Server-sent event stream of changes to a collection.
+
+    Each connection is a coroutine waiting on a broker queue, so it needs the
+    ASGI entry point. Under WSGI the stream would be buffered forever while
+    holding a worker thread, so it gets 204, which EventSource doesn't retry.
+    """
+    if not realtime.can_stream(request):
+        return HttpResponse(status=204)
+    user_id = realtime.check_ticket(request.GET.get('ticket', ''), pk)
+    if user_id is None:
+        return JsonResponse({'error': 'Invalid or expired ticket'}, status=403)
+    if not await sync_to_async(_can_subscribe)(user_id, pk):
+        return JsonResponse({'error': 'Collection not found'}, status=404)
+
+    subscription = realtime.get_broker().subscribe(realtime.collection_channel(pk))
+
+    async def stream():
+        try:
+            yield f'retry: {realtime.KEEPALIVE_SECONDS * 1000}\n\n'
+            while True:
+                event = await subscription.get(timeout=realtime.KEEPALIVE_SECONDS)
+                if event is None:
+                    # Comment lines keep proxies from closing idle connections
+                    yield ': keepalive\n\n'
+                else:
+                    yield f'data: {json.dumps(event)}\n\n'
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 
 @api_view(['POST'])
 @authentication_classes([])
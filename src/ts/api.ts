@@ -114,8 +114,10 @@ class ApiClient {
     await this.request(`/collections/${id}/`, { method: 'DELETE' });
   }
 
-  async getPublicCollections(): Promise<Collection[]> {
-    const response = await this.request<{results: Collection[]}>('/collections/public/');
+  async getPublicCollections(feed: 'recent' | 'popular' = 'recent', template?: string): Promise<Collection[]> {
+    const params = new URLSearchParams({ feed });
+    if (template) params.set('template', template);
+    const response = await this.request<{results: Collection[]}>(`/collections/public/?${params}`);
     return response.results || [];
   }
 
@@ -180,6 +182,16 @@ class ApiClient {
     });
   }
 
+  // Opens a stream of change events for the collection; the ticket in the URL expires,
+  // so callers re-subscribe once the EventSource gives up reconnecting
+  async subscribeToCollection(collectionId: number): Promise<EventSource | null> {
+    const response = await this.request<{url: string | null}>(`/collections/${collectionId}/events/ticket/`, {
+      method: 'POST',
+    });
+    // No URL means the server can't stream events (e.g. it runs under WSGI)
+    return response.url ? new EventSource(response.url) : null;
+  }
+
   // User methods
   async getCurrentUser(): Promise<User> {
     return this.request<User>('/users/me/');
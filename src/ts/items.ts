@@ -6,6 +6,7 @@ class ItemsPage {
   private collection: Collection | null = null;
   private items: Item[] = [];
   private currentItem: Item | null = null;
+  private reloadTimer: number | undefined;
 
   constructor() {
     // Get collection ID from URL
@@ -25,6 +26,31 @@ class ItemsPage {
     this.setupEventListeners();
     await this.loadCollection();
     await this.loadItems();
+    await this.subscribeToChanges();
+  }
+
+  private async subscribeToChanges(): Promise<void> {
+    try {
+      const source = await api.subscribeToCollection(this.collectionId);
+      if (!source) {
+        return;
+      }
+      source.onmessage = () => this.scheduleReload();
+      source.onerror = () => {
+        // A closed stream means the ticket expired or access was lost; ask for a new one
+        if (source.readyState === EventSource.CLOSED) {
+          setTimeout(() => this.subscribeToChanges(), 5000);
+        }
+      };
+    } catch (error) {
+      console.error('Failed to subscribe to collection updates:', error);
+    }
+  }
+
+  private scheduleReload(): void {
+    // Coalesce bursts of changes (e.g. bulk imports) into one refetch
+    window.clearTimeout(this.reloadTimer);
+    this.reloadTimer = window.setTimeout(() => this.loadItems(), 250);
   }
 
   private setupEventListeners(): void {
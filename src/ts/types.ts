@@ -14,6 +14,7 @@ export interface Collection {
   description: string;
   visibility: 'private' | 'public' | 'unlisted';
   is_public: boolean;
+  template: number | null;
   created_by: User;
   created_at: string;
   updated_at: string;
@@ -22,6 +23,21 @@ export interface Collection {
   shared_with_count: number;
 }
 
+export interface TemplateField {
+  name: string;
+  type: 'string' | 'integer' | 'number' | 'boolean' | 'date' | 'list';
+  required?: boolean;
+}
+
+export interface CollectionTemplate {
+  id: number;
+  name: string;
+  slug: string;
+  description: string;
+  fields: TemplateField[];
+  updated_at: string;
+}
+
 export interface Item {
   id: number;
   name: string;
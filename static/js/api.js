@@ -80,8 +80,11 @@ class ApiClient {
     async deleteCollection(id) {
         await this.request(`/collections/${id}/`, { method: 'DELETE' });
     }
-    async getPublicCollections() {
-        const response = await this.request('/collections/public/');
+    async getPublicCollections(feed = 'recent', template) {
+        const params = new URLSearchParams({ feed });
+        if (template)
+            params.set('template', template);
+        const response = await this.request(`/collections/public/?${params}`);
         return response.results || [];
     }
     async getUnlistedCollections() {
@@ -127,6 +130,15 @@ class ApiClient {
             body: JSON.stringify(data),
         });
     }
+    // Opens a stream of change events for the collection; the ticket in the URL expires,
+    // so callers re-subscribe once the EventSource gives up reconnecting
+    async subscribeToCollection(collectionId) {
+        const response = await this.request(`/collections/${collectionId}/events/ticket/`, {
+            method: 'POST',
+        });
+        // No URL means the server can't stream events (e.g. it runs under WSGI)
+        return response.url ? new EventSource(response.url) : null;
+    }
     // User methods
     async getCurrentUser() {
         return this.request('/users/me/');
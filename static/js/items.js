@@ -18,6 +18,30 @@ class ItemsPage {
         this.setupEventListeners();
         await this.loadCollection();
         await this.loadItems();
+        await this.subscribeToChanges();
+    }
+    async subscribeToChanges() {
+        try {
+            const source = await api.subscribeToCollection(this.collectionId);
+            if (!source) {
+                return;
+            }
+            source.onmessage = () => this.scheduleReload();
+            source.onerror = () => {
+                // A closed stream means the ticket expired or access was lost; ask for a new one
+                if (source.readyState === EventSource.CLOSED) {
+                    setTimeout(() => this.subscribeToChanges(), 5000);
+                }
+            };
+        }
+        catch (error) {
+            console.error('Failed to subscribe to collection updates:', error);
+        }
+    }
+    scheduleReload() {
+        // Coalesce bursts of changes (e.g. bulk imports) into one refetch
+        window.clearTimeout(this.reloadTimer);
+        this.reloadTimer = window.setTimeout(() => this.loadItems(), 250);
     }
     setupEventListeners() {
         // New item button